@@ -0,0 +1,280 @@
+"""Throughput and latency benchmark for the auth endpoints.
+
+Drives /auth/register, /auth/login and /auth/logout against a file-backed
+sqlite database, either in-process through httpx's ASGI transport or against
+a live uvicorn server on localhost, and writes req/s plus p50/p95/p99 latency
+per endpoint as JSON. The workload is repeated --repeat times, each in a
+fresh process and database, and every figure is the median over the
+repetitions. With --baseline the result is compared against a stored one on
+req/s and p50 (--tolerance) and p95 (the looser --tail-tolerance; p99 of a few
+hundred requests is too noisy to gate on), and the exit status is non-zero
+on regression. Latency changes under --min-delta-ms never count. Results
+recorded with a different mode, CPU count or workload are refused rather
+than compared.
+
+    python benchmarks/auth_bench.py --mode inprocess --output bench.json
+    python benchmarks/auth_bench.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ENDPOINTS = ("register", "login", "logout")
+PASSWORD = "Password1"
+# Results are only comparable when these match
+COMPARABLE_META = ("mode", "cpus", "bcrypt_rounds", "concurrency", "users", "iterations")
+# (key, label, whether higher is worse, whether the tail tolerance applies)
+GATED_METRICS = (("rps", "req/s", False, False), ("p50_ms", "p50 ms", True, False), ("p95_ms", "p95 ms", True, True))
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, wall_seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+async def run_phase(concurrency: int, jobs: list, send) -> tuple[dict, list]:
+    """Run ``send(job)`` for every job with bounded concurrency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, responses = [], []
+    errors = 0
+
+    async def one(job):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await send(job)
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+            else:
+                responses.append(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(job) for job in jobs))
+    return summarize(latencies, errors, time.perf_counter() - started), responses
+
+
+async def drive(client: httpx.AsyncClient, args) -> dict:
+    users = [f"bench{n}@example.com" for n in range(args.users)]
+    results = {}
+
+    results["register"], _ = await run_phase(args.concurrency, users, lambda email: client.post(
+        "/auth/register", json={"email": email, "full_name": "Bench User", "password": PASSWORD}))
+
+    logins = users * args.iterations
+    results["login"], responses = await run_phase(args.concurrency, logins, lambda email: client.post(
+        "/auth/login", json={"email": email, "password": PASSWORD}))
+
+    tokens = [response.json()["access_token"] for response in responses]
+    results["logout"], _ = await run_phase(args.concurrency, tokens, lambda token: client.post(
+        "/auth/logout", headers={"Authorization": f"Bearer {token}"}))
+    return results
+
+
+def configure_environment(args, database_path: Path) -> dict:
+    # Must happen before d4_auth_svc is imported; config is read at import time
+    env = {
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "LOGIN_THROTTLE_ENABLED": "false",
+        "TOKEN_SWEEP_INTERVAL_SECONDS": "0",
+        "TOKEN_SIGNING_KEYS": "bench:benchmark-signing-key",
+        "EMAIL_SERVICE_URL": "",
+    }
+    os.environ.update(env)
+    return env
+
+
+def create_schema() -> None:
+    from d4_auth_svc.models import Base
+    from d4_auth_svc.models.base import engine
+
+    Base.metadata.create_all(engine)
+
+
+async def run_inprocess(args) -> dict:
+    from d4_auth_svc.app import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await drive(client, args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_live(args) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "d4_auth_svc.app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            return await drive(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def run_repetitions(args) -> dict:
+    """Run the workload ``args.repeat`` times in fresh processes; per endpoint, the median of each figure."""
+    command = [sys.executable, __file__, "--single-run", "--mode", args.mode, "--concurrency", str(args.concurrency),
+               "--users", str(args.users), "--iterations", str(args.iterations),
+               "--bcrypt-rounds", str(args.bcrypt_rounds)]
+    runs = []
+    for _ in range(args.repeat):
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        runs.append(json.loads(completed.stdout))
+    return {
+        endpoint: {
+            "requests": runs[0][endpoint]["requests"],
+            "errors": sum(run[endpoint]["errors"] for run in runs),
+            **{key: round(statistics.median(run[endpoint][key] for run in runs), 3)
+               for key in ("rps", "p50_ms", "p95_ms", "p99_ms")},
+        }
+        for endpoint in ENDPOINTS
+    }
+
+
+def incomparable(result: dict, baseline: dict) -> list[str]:
+    return [
+        f"{key}: {result['meta'].get(key)} here, {baseline['meta'].get(key)} in the baseline"
+        for key in COMPARABLE_META
+        if result["meta"].get(key) != baseline["meta"].get(key)
+    ]
+
+
+def compare(result: dict, baseline: dict, tolerance: float, tail_tolerance: float, min_delta_ms: float) -> list[str]:
+    """Regressions of req/s or p50 beyond ``tolerance``, or p95 beyond ``tail_tolerance`` (fractions), per endpoint."""
+    regressions = []
+    for endpoint, expected in baseline["endpoints"].items():
+        actual = result["endpoints"].get(endpoint)
+        if actual is None:
+            regressions.append(f"{endpoint}: missing from results")
+            continue
+        if actual["errors"]:
+            regressions.append(f"{endpoint}: {actual['errors']} failed requests")
+        for key, label, higher_is_worse, tail in GATED_METRICS:
+            allowed = tail_tolerance if tail else tolerance
+            if higher_is_worse:
+                regressed = (actual[key] > expected[key] * (1 + allowed)
+                             and actual[key] - expected[key] > min_delta_ms)
+            else:
+                regressed = actual[key] < expected[key] * (1 - allowed)
+            if regressed:
+                regressions.append(f"{endpoint}: {label} {actual[key]} vs baseline {expected[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the auth endpoints.")
+    parser.add_argument("--mode", choices=("inprocess", "live"), default="inprocess")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=200, help="size of the registered user population")
+    parser.add_argument("--iterations", type=int, default=2, help="logins (and logouts) per user")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions, each in a fresh process")
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this JSON result and fail on regression")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed req/s and p50 regression as a fraction")
+    parser.add_argument("--tail-tolerance", type=float, default=1.0, help="allowed p95 regression as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=10.0, help="latency changes below this are ignored")
+    # One repetition, printed as JSON for the parent process
+    parser.add_argument("--single-run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_run:
+        logging.basicConfig(level=logging.CRITICAL)
+        with tempfile.TemporaryDirectory() as workdir:
+            configure_environment(args, Path(workdir) / "bench.db")
+            create_schema()
+            runner = run_live if args.mode == "live" else run_inprocess
+            print(json.dumps(asyncio.run(runner(args))))
+        return
+
+    endpoints = run_repetitions(args)
+    result = {
+        "meta": {
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "iterations": args.iterations,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "endpoints": endpoints,
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        mismatches = incomparable(result, baseline)
+        if mismatches:
+            for mismatch in mismatches:
+                print(f"NOT COMPARABLE {mismatch}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(result, baseline, args.tolerance, args.tail_tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
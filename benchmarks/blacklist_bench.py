@@ -0,0 +1,134 @@
+"""Storage and lookup cost of token_blacklist keys: raw tokens vs SHA-256 digests.
+
+Builds two sqlite databases holding the same synthetic blacklist of signed
+access tokens, one keyed by the raw token string (the schema before digest
+keys) and one by the 32-byte digest, with the same secondary indexes. Reports
+table and index sizes from dbstat and the latency of primary-key lookups
+(half present, half absent) through SQLAlchemy, as JSON.
+
+    python benchmarks/blacklist_bench.py --rows 200000
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import Column, MetaData, String, Table, TIMESTAMP, create_engine, insert, select, text
+
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+from d4_auth_svc.tokens import TokenSigner
+
+legacy_metadata = MetaData()
+legacy_table = Table(
+    "token_blacklist", legacy_metadata,
+    Column("token", String, primary_key=True),
+    Column("expires_at", TIMESTAMP, nullable=False, index=True),
+    Column("revoked_at", TIMESTAMP, index=True),
+)
+
+# How each layout derives its key from a token
+KEYS = {"token": lambda token: token, "token_digest": digest_token}
+
+
+def synthetic_tokens(count: int) -> list[str]:
+    signer = TokenSigner({"bench": b"benchmark-signing-key"})
+    now = int(time.time())
+    # Session-minted tokens, as logout revokes them
+    return [signer.issue(str(n), 900, now=now, session_id=f"{n:032x}", epoch=0) for n in range(count)]
+
+
+def build(path: Path, table, key, tokens: list[str], batch: int = 10000) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    table.metadata.create_all(engine)
+    now = datetime.datetime.utcnow()
+    expires = now + datetime.timedelta(minutes=15)
+    with engine.begin() as connection:
+        for start in range(0, len(tokens), batch):
+            connection.execute(insert(table), [
+                {key: value, "expires_at": expires, "revoked_at": now}
+                for value in map(KEYS[key], tokens[start:start + batch])
+            ])
+    with engine.begin() as connection:
+        connection.execute(text("VACUUM"))
+    engine.dispose()
+
+
+def sizes(path: Path) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all()
+    engine.dispose()
+    by_name = dict(rows)
+    table_bytes = by_name.pop("token_blacklist", 0)
+    # The primary key is the autoindex on a rowid table
+    pk_bytes = sum(size for name, size in by_name.items() if name.startswith("sqlite_autoindex_token_blacklist"))
+    index_bytes = sum(size for name, size in by_name.items()
+                      if name.startswith(("ix_token_blacklist", "sqlite_autoindex_token_blacklist")))
+    return {
+        "file_bytes": path.stat().st_size,
+        "table_bytes": table_bytes,
+        "primary_key_index_bytes": pk_bytes,
+        "index_bytes": index_bytes,
+    }
+
+
+def lookups(path: Path, table, key, probes: list[str]) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    column = table.c[key]
+    latencies = []
+    with engine.connect() as connection:
+        for token in probes:
+            value = KEYS[key](token)
+            started = time.perf_counter()
+            connection.execute(select(table.c.expires_at).where(column == value)).first()
+            latencies.append(time.perf_counter() - started)
+    engine.dispose()
+    latencies.sort()
+    return {
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare raw-token and digest keys for token_blacklist.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--probes", type=int, default=20000)
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    args = parser.parse_args()
+
+    tokens = synthetic_tokens(args.rows)
+    absent = synthetic_tokens(args.probes // 2)
+    rng = random.Random(7)
+    probes = rng.sample(tokens, args.probes - len(absent)) + absent
+    rng.shuffle(probes)
+
+    layouts = {"raw_token": (legacy_table, "token"), "digest": (TokenBlacklist.__table__, "token_digest")}
+    result = {
+        "meta": {
+            "rows": args.rows,
+            "probes": args.probes,
+            "token_length": len(tokens[0]),
+            "python": platform.python_version(),
+        }
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, (table, key) in layouts.items():
+            path = Path(workdir) / f"{name}.db"
+            build(path, table, key, tokens)
+            result[name] = {**sizes(path), **lookups(path, table, key, probes)}
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Per-request response serialization cost of the auth routes.
+
+Mounts handlers returning the register, login and logout bodies on bare
+FastAPI apps, with no database or hashing behind them, and drives them in
+process through the ASGI interface. Each body is served three ways: as
+before (no response_model, jsonable_encoder and json.dumps), with its
+declared response model, and with the response model plus ORJSONResponse.
+Reports, as JSON, the p50 microseconds of a whole request and of the
+serialization step alone (FastAPI's serialize_response plus rendering the
+body with the response class).
+
+    python benchmarks/serialization_bench.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from d4_auth_svc.routers.user_logout import LogoutResponse
+from d4_auth_svc.routers.user_registration import RegistrationResponse
+from d4_auth_svc.sessions import TokenPairResponse
+from d4_auth_svc.tokens import TokenSigner
+
+
+def bodies() -> dict:
+    signer = TokenSigner({"bench": b"benchmark-signing-key"})
+    return {
+        "register": (RegistrationResponse, {"message": "User registered successfully"}),
+        "login": (TokenPairResponse, {
+            "access_token": signer.issue("42", 900, session_id="0" * 32, epoch=0),
+            "refresh_token": f"{'0' * 32}.{'x' * 43}",
+            "token_type": "bearer",
+            "expires_in": 900,
+        }),
+        "logout": (LogoutResponse, {"message": "Logout successful, token invalidated."}),
+    }
+
+
+VARIANTS = {
+    "before": (JSONResponse, False),
+    "response_model": (JSONResponse, True),
+    "response_model_orjson": (ORJSONResponse, True),
+}
+
+
+def build_app(response_class, with_model: bool) -> FastAPI:
+    app = FastAPI(default_response_class=response_class)
+    for name, (model, body) in bodies().items():
+        async def handler(body=body):
+            return body
+
+        app.add_api_route(f"/{name}", handler, methods=["POST"], response_model=model if with_model else None)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"content-length", b"0")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    chunks = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(chunks)
+
+
+async def encode(route: APIRoute, response_class, body: dict) -> bytes:
+    # What FastAPI does with a handler's return value before it reaches the wire
+    content = await serialize_response(field=route.response_field, response_content=body)
+    return response_class(content).body
+
+
+async def p50_us(operation, requests: int) -> float:
+    for _ in range(min(1000, requests)):
+        await operation()
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await operation()
+        latencies.append(time.perf_counter() - started)
+    return round(statistics.median(latencies) * 1e6, 2)
+
+
+async def run(requests: int) -> dict:
+    result = {"meta": {"requests": requests, "python": platform.python_version()}}
+    apps = {name: build_app(*variant) for name, variant in VARIANTS.items()}
+    for endpoint, (_, body) in bodies().items():
+        result[endpoint] = {}
+        for name, app in apps.items():
+            route = next(route for route in app.routes if getattr(route, "path", None) == f"/{endpoint}")
+            response_class = VARIANTS[name][0]
+            result[endpoint][name] = {
+                "request_us": await p50_us(lambda: call(app, f"/{endpoint}"), requests),
+                "serialize_us": await p50_us(lambda: encode(route, response_class, body), requests),
+            }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response serialization cost per auth route.")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    args = parser.parse_args()
+
+    output = json.dumps(asyncio.run(run(args.requests)), indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Cold-start benchmark: import time and time-to-ready of the app.
+
+Each sample runs in a fresh interpreter. It measures how long
+``import d4_auth_svc.app`` takes, then runs the lifespan startup (pool
+warmup, bcrypt warmup, cache priming) against a file-backed sqlite database
+until the app would report ready on /readyz. Medians are written as JSON;
+with --baseline the run fails if either one regresses beyond the tolerance.
+With --importtime the slowest modules of one import are listed as well.
+
+    python benchmarks/startup_bench.py --baseline benchmarks/startup_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SAMPLE = """
+import asyncio, json, time
+started = time.perf_counter()
+from d4_auth_svc.app import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        assert app.state.ready
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"import_seconds": imported - started, "ready_seconds": ready - started}))
+"""
+
+
+def sample_env(workdir: Path, bcrypt_rounds: int) -> dict:
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).parents[1] / "src"),
+                                                    os.environ.get("PYTHONPATH")])),
+        "DATABASE_URL": f"sqlite:///{workdir / 'startup.db'}",
+        "BCRYPT_ROUNDS": str(bcrypt_rounds),
+        "TOKEN_SWEEP_INTERVAL_SECONDS": "0",
+        "TOKEN_SIGNING_KEYS": "bench:benchmark-signing-key",
+        "EMAIL_SERVICE_URL": "",
+    }
+
+
+def run_sample(env: dict) -> dict:
+    result = subprocess.run([sys.executable, "-c", SAMPLE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, limit: int) -> list[tuple[str, float]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import d4_auth_svc.app"],
+                            env=env, capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if self_us.isdigit():
+            timings.append((name, int(self_us) / 1e6))
+    return sorted(timings, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def create_schema(env: dict) -> None:
+    code = "from d4_auth_svc.models import Base, base; Base.metadata.create_all(base.engine)"
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-ready of the app.")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost used by the bcrypt warmup")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="also list the N slowest imports")
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--baseline", help="compare against this JSON result and fail on regression")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed regression as a fraction")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = sample_env(Path(workdir), args.bcrypt_rounds)
+        create_schema(env)
+        samples = [run_sample(env) for _ in range(args.samples)]
+        imports = slowest_imports(env, args.importtime) if args.importtime else []
+
+    result = {
+        "meta": {
+            "samples": args.samples,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 4),
+        "ready_seconds": round(statistics.median(s["ready_seconds"] for s in samples), 4),
+    }
+    if imports:
+        result["slowest_imports"] = {name: round(seconds, 4) for name, seconds in imports}
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = [
+            f"{key}: {result[key]}s > baseline {baseline[key]}s"
+            for key in ("import_seconds", "ready_seconds")
+            if result[key] > baseline[key] * (1 + args.tolerance)
+        ]
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Key token_blacklist by token digest
+
+Revision ID: 0df2403a2fc6
+Revises: 6c11e9b1a22f
+Create Date: 2026-10-18 12:40:12.418306
+
+Rows are rewritten into a new table keyed by the 32-byte SHA-256 of the
+token, one keyset-paginated batch at a time, then the tables are swapped.
+The digests cannot be turned back into tokens, so a downgrade restores the
+old schema empty: tokens revoked before it are accepted again until they
+expire.
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0df2403a2fc6'
+down_revision: Union[str, None] = '6c11e9b1a22f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.create_table('token_blacklist_digest',
+    sa.Column('token_digest', sa.LargeBinary(length=32).with_variant(mysql.BINARY(length=32), 'mysql', 'mariadb'),
+              nullable=False),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('revoked_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('token_digest')
+    )
+
+    old = sa.table('token_blacklist', sa.column('token', sa.String()), sa.column('expires_at', sa.TIMESTAMP()),
+                   sa.column('revoked_at', sa.TIMESTAMP()))
+    new = sa.table('token_blacklist_digest', sa.column('token_digest', sa.LargeBinary()),
+                   sa.column('expires_at', sa.TIMESTAMP()), sa.column('revoked_at', sa.TIMESTAMP()))
+    connection = op.get_bind()
+    last_token = None
+    while True:
+        query = sa.select(old.c.token, old.c.expires_at, old.c.revoked_at).order_by(old.c.token).limit(BATCH_SIZE)
+        if last_token is not None:
+            query = query.where(old.c.token > last_token)
+        rows = connection.execute(query).all()
+        if not rows:
+            break
+        connection.execute(new.insert(), [
+            {"token_digest": hashlib.sha256(row.token.encode("utf-8")).digest(),
+             "expires_at": row.expires_at, "revoked_at": row.revoked_at}
+            for row in rows
+        ])
+        last_token = rows[-1].token
+
+    op.drop_index(op.f('ix_token_blacklist_revoked_at'), table_name='token_blacklist')
+    op.drop_index(op.f('ix_token_blacklist_expires_at'), table_name='token_blacklist')
+    op.drop_table('token_blacklist')
+    op.rename_table('token_blacklist_digest', 'token_blacklist')
+    op.create_index(op.f('ix_token_blacklist_expires_at'), 'token_blacklist', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_token_blacklist_revoked_at'), 'token_blacklist', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_token_blacklist_revoked_at'), table_name='token_blacklist')
+    op.drop_index(op.f('ix_token_blacklist_expires_at'), table_name='token_blacklist')
+    op.drop_table('token_blacklist')
+    op.create_table('token_blacklist',
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+    sa.Column('revoked_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('token')
+    )
+    op.create_index(op.f('ix_token_blacklist_expires_at'), 'token_blacklist', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_token_blacklist_revoked_at'), 'token_blacklist', ['revoked_at'], unique=False)
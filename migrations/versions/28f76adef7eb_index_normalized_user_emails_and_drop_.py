@@ -0,0 +1,82 @@
+"""Index normalized user emails and drop redundant indexes
+
+Revision ID: 28f76adef7eb
+Revises: 0df2403a2fc6
+Create Date: 2026-10-18 12:24:47.606956
+
+Users are looked up by email_normalized, the address lowercased, under a
+unique index that also makes addresses differing only in case one account.
+It replaces the unique index on the raw email, and ix_users_id duplicated
+the primary key. Existing rows are backfilled in keyset-paginated batches.
+The upgrade refuses to start if two accounts already share a normalized
+email, so they can be merged by hand first. Both the check and the backfill
+normalize in Python: sqlite's lower() only folds ASCII.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from d4_auth_svc.models.user import normalize_email
+
+
+# revision identifiers, used by Alembic.
+revision: str = '28f76adef7eb'
+down_revision: Union[str, None] = '0df2403a2fc6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def batches(connection, users):
+    """Every user's id and email, in keyset-paginated batches."""
+    last_id = None
+    while True:
+        query = sa.select(users.c.id, users.c.email).order_by(users.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(users.c.id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    users = sa.table('users', sa.column('id', sa.Integer()), sa.column('email', sa.String()),
+                     sa.column('email_normalized', sa.String()))
+    connection = op.get_bind()
+
+    # Checked before any change, as sqlite runs DDL outside the transaction
+    seen, duplicates = set(), set()
+    for rows in batches(connection, users):
+        for row in rows:
+            normalized = normalize_email(row.email)
+            if normalized in seen:
+                duplicates.add(normalized)
+            seen.add(normalized)
+    if duplicates:
+        raise RuntimeError(f"Accounts share an email differing only in case, merge them first: "
+                           f"{sorted(duplicates)[:10]}")
+
+    op.add_column('users', sa.Column('email_normalized', sa.String(), nullable=True))
+    for rows in batches(connection, users):
+        connection.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id'))
+                          .values(email_normalized=sa.bindparam('normalized')),
+            [{"user_id": row.id, "normalized": normalize_email(row.email)} for row in rows],
+        )
+
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('email_normalized', existing_type=sa.String(), nullable=False)
+    op.create_index(op.f('ix_users_email_normalized'), 'users', ['email_normalized'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_email_normalized'), table_name='users')
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.drop_column('users', 'email_normalized')
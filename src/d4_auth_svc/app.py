@@ -1,12 +1,181 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import text
+
+from d4_auth_svc.breached_passwords import breached_passwords
+from d4_auth_svc.config import EMAIL_DRAIN_TIMEOUT, Settings
+from d4_auth_svc.email_dispatch import email_dispatcher
+from d4_auth_svc.hashing import password_hasher
+from d4_auth_svc.metrics import MetricsMiddleware, registry
+from d4_auth_svc.models import base
+from d4_auth_svc.profiling import ProfilingMiddleware, request_profiler
+from d4_auth_svc.registration_writer import registration_writer
+from d4_auth_svc.revocation_cache import revocation_cache
+from d4_auth_svc.revocation_sync import revocation_sync
+from d4_auth_svc.revocation_writer import revocation_writer
+from d4_auth_svc.session_writer import session_writer
+from d4_auth_svc.structured_logging import RequestIdMiddleware, log_stats
+from d4_auth_svc.throttling import login_throttle
+from d4_auth_svc.token_epochs import user_epochs
+from d4_auth_svc.token_sweeper import token_sweeper
+from d4_auth_svc.routers import (
+    user_registration, user_login, user_logout, token_verify, token_introspect, token_refresh, revoke_all,
+    metrics, health, profiles,
+)
+
+# Startup cost of this process, exported with the other component stats
+startup_timings = {"import_seconds": time.perf_counter() - _import_started}
+
+
+def pool_stats(name: str):
+    # Looked up at scrape time; tests swap the engines out
+    return lambda: base.get_pool_stats()[name]
+
+
+# Component counters are exported as gauges on every /metrics scrape
+registry.register_stats("startup", lambda: startup_timings)
+registry.register_stats("logging", log_stats.stats)
+registry.register_stats("password_hash", password_hasher.stats)
+registry.register_stats("breached_passwords", breached_passwords.stats)
+registry.register_stats("email", email_dispatcher.stats)
+registry.register_stats("revocation_cache", revocation_cache.stats)
+registry.register_stats("revocation_sync", revocation_sync.stats)
+registry.register_stats("revocation_writer", revocation_writer.stats)
+registry.register_stats("session_writer", session_writer.stats)
+registry.register_stats("registration_writer", registration_writer.stats)
+registry.register_stats("token_sweeper", token_sweeper.stats)
+registry.register_stats("login_throttle", login_throttle.stats)
+registry.register_stats("token_epochs", user_epochs.stats)
+registry.register_stats("profiling", request_profiler.stats)
+registry.register_stats("introspection", token_introspect.introspection_stats.stats)
+registry.register_stats("db_pool", pool_stats("sync"), label=("engine", "sync"))
+registry.register_stats("db_pool", pool_stats("async"), label=("engine", "async"))
+registry.register_stats("db_replicas", lambda: base.replicas.stats())
+
+
+def json_response_class(name: str) -> type[JSONResponse]:
+    """Response class for APP_JSON_RESPONSE; orjson encodes bodies several times faster than json.dumps."""
+    if name == "json":
+        return JSONResponse
+    if name not in ("orjson", "auto"):
+        raise ValueError(f"Unsupported APP_JSON_RESPONSE: {name!r}")
+    if importlib.util.find_spec("orjson") is None:
+        if name == "orjson":
+            raise RuntimeError("APP_JSON_RESPONSE is orjson but orjson is not installed")
+        return JSONResponse
+    return ORJSONResponse
+
+
+async def warm_revocation_cache() -> None:
+    try:
+        async with base.AsyncSessionLocal() as session:
+            await revocation_cache.warm_from(session)
+    except Exception as e:
+        # A cold cache is still correct; every check falls back to the database
+        logging.error(e, exc_info=True)
+
+
+async def warm_db_pool(connections: int) -> None:
+    """Open ``connections`` pooled connections at once so first requests skip the connect."""
+    if connections < 1 or base.is_memory_sqlite(str(base.async_engine.url)):
+        # An in-memory database is a single connection; there is no pool to fill
+        return
+
+    async def ping():
+        async with base.AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*(ping() for _ in range(connections)))
+    except Exception as e:
+        # Requests connect on demand; report ready anyway
+        logging.error(e, exc_info=True)
+
+
+async def warm_up(settings: Settings) -> None:
+    started = time.perf_counter()
+    await asyncio.gather(
+        warm_db_pool(settings.warm_db_connections),
+        password_hasher.warm_up(),
+    )
+    # Needs the pool, so it runs once the connections are open
+    await warm_revocation_cache()
+    startup_timings["warmup_seconds"] = time.perf_counter() - started
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        started = time.perf_counter()
+        if settings.warmup:
+            await warm_up(settings)
+        else:
+            await warm_revocation_cache()
+        # Without a delivery URL the dispatcher starts lazily if ever needed
+        if email_dispatcher.url:
+            await email_dispatcher.start()
+        await token_sweeper.start()
+        await revocation_sync.start()
+        await base.replicas.start()
+        startup_timings["startup_seconds"] = time.perf_counter() - started
+        app.state.ready = True
+        yield
+        app.state.ready = False
+        await registration_writer.stop()
+        await session_writer.stop()
+        await revocation_writer.stop()
+        await revocation_sync.stop()
+        await base.replicas.stop()
+        await token_sweeper.stop()
+        # Deliver queued email, then release the bcrypt workers
+        await email_dispatcher.stop(timeout=EMAIL_DRAIN_TIMEOUT)
+        password_hasher.shutdown()
+
+    # Routes with a response_model are serialized by pydantic-core, then encoded by this class
+    app = FastAPI(debug=settings.debug, lifespan=lifespan,
+                  default_response_class=json_response_class(settings.json_response))
+    app.state.settings = settings
+    app.state.ready = False
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    if settings.profiling:
+        # Not installed otherwise, so requests pay nothing for it
+        app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
 
-from d4_auth_svc.routers import user_registration, user_login, user_logout
+    # Mount the user registration router under /auth
+    app.include_router(user_registration.router, prefix="/auth")
+    # Mount the user login router under /auth
+    app.include_router(user_login.router, prefix="/auth")
+    # Mount the user logout router under /auth
+    app.include_router(user_logout.router, prefix="/auth")
+    # Mount the token verification router under /auth
+    app.include_router(token_verify.router, prefix="/auth")
+    # Mount the batch token introspection router under /auth
+    app.include_router(token_introspect.router, prefix="/auth")
+    # Mount the refresh token rotation router under /auth
+    app.include_router(token_refresh.router, prefix="/auth")
+    # Mount the revoke-all (log out everywhere) router under /auth
+    app.include_router(revoke_all.router, prefix="/auth")
+    # Mount the metrics endpoint at the root
+    app.include_router(metrics.router)
+    # Mount the liveness and readiness probes at the root
+    app.include_router(health.router)
+    if settings.profiling:
+        # Mount the profile listing and download endpoints at the root
+        app.include_router(profiles.router)
+    return app
 
-app = FastAPI(debug=True)
 
-# Mount the user registration router under /auth
-app.include_router(user_registration.router, prefix="/auth")
-# Mount the user login router under /auth
-app.include_router(user_login.router, prefix="/auth")
-# Mount the user logout router under /auth
-app.include_router(user_logout.router, prefix="/auth")
+app = create_app()
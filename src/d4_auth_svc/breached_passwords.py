@@ -0,0 +1,236 @@
+"""Offline check of passwords against a breach corpus.
+
+The corpus is a file of sorted, fixed-width 20-byte SHA-1 digests behind a
+small header. It is memory-mapped read-only and searched with a binary
+search, so a lookup touches about log2(n) pages and costs microseconds.
+Nothing is loaded onto the heap: the pages live in the OS page cache and are
+shared by every server process mapping the same file.
+
+``d4_auth_svc_build_breached_passwords`` turns a plain list of SHA-1 hex
+digests (one per line; a ``:count`` suffix as in the Pwned Passwords
+downloads is ignored) into that file. Input larger than one chunk is sorted
+in runs on disk and merged, so memory stays flat for any corpus size.
+"""
+import argparse
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from d4_auth_svc.config import BREACHED_PASSWORDS_FILE
+
+MAGIC = b"D4BPWD01"
+HEADER = struct.Struct("<8sQ")
+DIGEST_SIZE = hashlib.sha1().digest_size
+
+
+class BreachedPasswordFileError(Exception):
+    """Raised when a breached-password file is missing, truncated or not in the expected format."""
+
+
+def parse_digest(line: str) -> Optional[bytes]:
+    value = line.strip().partition(":")[0]
+    if len(value) != DIGEST_SIZE * 2:
+        return None
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return None
+
+
+class BreachedPasswordIndex:
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # Checked before mapping: mmap refuses an empty file with a ValueError
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise BreachedPasswordFileError(f"{path} is too short to be a breached-password file")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.entries = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise BreachedPasswordFileError(f"{path} is not a breached-password file")
+        if len(self._data) != HEADER.size + self.entries * DIGEST_SIZE:
+            raise BreachedPasswordFileError(f"{path} is truncated")
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Binary search jumps around; read-ahead would only evict useful pages
+            self._data.madvise(mmap.MADV_RANDOM)
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def contains_digest(self, digest: bytes) -> bool:
+        data, lo, hi = self._data, 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER.size + mid * DIGEST_SIZE
+            record = data[offset:offset + DIGEST_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def contains(self, password: str) -> bool:
+        return self.contains_digest(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def close(self) -> None:
+        self._data.close()
+
+
+class BreachedPasswordCheck:
+    """Opens the configured file on first use; without one every password passes."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._index: Optional[BreachedPasswordIndex] = None
+        self._opened = False
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+
+    def _open(self) -> Optional[BreachedPasswordIndex]:
+        with self._lock:
+            if not self._opened:
+                try:
+                    self._index = BreachedPasswordIndex(self.path)
+                except (OSError, BreachedPasswordFileError) as e:
+                    # Registration keeps working on the other password rules
+                    logging.error(e, exc_info=True)
+                self._opened = True
+        return self._index
+
+    def is_breached(self, password: str) -> bool:
+        if not self.path:
+            return False
+        index = self._index if self._opened else self._open()
+        if index is None:
+            return False
+        self.lookups += 1
+        if index.contains(password):
+            self.hits += 1
+            return True
+        return False
+
+    def reset(self, path: Optional[str] = None) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.close()
+            self.path = path
+            self._index = None
+            self._opened = False
+            self.lookups = 0
+            self.hits = 0
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._index is not None,
+            "entries": len(self._index) if self._index is not None else 0,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+breached_passwords = BreachedPasswordCheck(BREACHED_PASSWORDS_FILE)
+
+
+@dataclass
+class BuildResult:
+    lines: int = 0
+    entries: int = 0
+    skipped: int = 0
+    runs: int = 0
+    seconds: float = 0.0
+
+
+def _read_run(f: BinaryIO) -> Iterator[bytes]:
+    f.seek(0)
+    while True:
+        record = f.read(DIGEST_SIZE)
+        if not record:
+            return
+        yield record
+
+
+def build_index(lines: Iterable[str], output_path: str, chunk_size: int = 5_000_000) -> BuildResult:
+    """Write the sorted, de-duplicated digests from ``lines`` to ``output_path``."""
+    started = time.perf_counter()
+    result = BuildResult()
+    runs: list[BinaryIO] = []
+    chunk: list[bytes] = []
+    directory = os.path.dirname(os.path.abspath(output_path))
+
+    def spill():
+        chunk.sort()
+        run = tempfile.TemporaryFile(dir=directory)
+        run.write(b"".join(chunk))
+        runs.append(run)
+        chunk.clear()
+
+    try:
+        for line in lines:
+            result.lines += 1
+            digest = parse_digest(line)
+            if digest is None:
+                result.skipped += 1
+                continue
+            chunk.append(digest)
+            if len(chunk) >= chunk_size:
+                spill()
+        if runs and chunk:
+            spill()
+        result.runs = len(runs)
+        merged = heapq.merge(*(_read_run(run) for run in runs)) if runs else iter(sorted(chunk))
+
+        # Written next to the target and renamed, so processes mapping the old file are unaffected
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, 0))
+                previous = None
+                for digest in merged:
+                    if digest != previous:
+                        out.write(digest)
+                        result.entries += 1
+                        previous = digest
+                out.seek(0)
+                out.write(HEADER.pack(MAGIC, result.entries))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    finally:
+        for run in runs:
+            run.close()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the breached-password file from a list of SHA-1 digests.")
+    parser.add_argument("path", help="input with one SHA-1 hex digest per line (optionally digest:count), or - for stdin")
+    parser.add_argument("output", help="file to write; point BREACHED_PASSWORDS_FILE at it")
+    parser.add_argument("--chunk-size", type=int, default=5_000_000, help="digests sorted in memory per run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", errors="replace")
+    with source:
+        result = build_index(source, args.output, chunk_size=args.chunk_size)
+    logging.info(
+        f"Wrote {result.entries} digests to {args.output} in {result.seconds:.1f}s "
+        f"({result.lines} lines, {result.skipped} skipped, {result.runs} sorted runs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
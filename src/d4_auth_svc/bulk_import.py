@@ -0,0 +1,192 @@
+"""Streaming bulk import of user accounts from CSV or JSONL.
+
+Input is read and processed one chunk at a time, so memory stays flat no
+matter how large the file is. Each chunk is validated with
+UserRegistrationPayload, checked against existing emails with one IN query,
+hashed across a process pool and inserted with a single executemany.
+Rows that cannot be imported are written to a JSONL error report.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from d4_auth_svc.hashing import hash_password_sync
+from d4_auth_svc.models import base
+from d4_auth_svc.models.user import User, normalize_email
+from d4_auth_svc.routers.user_registration import UserRegistrationPayload
+
+FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, object]]:
+    """Yield (line number, record) pairs; undecodable lines yield the error instead."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Surplus columns are collected under a None key; drop them
+            record.pop(None, None)
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, e
+    else:
+        raise ValueError(f"Unsupported import format: {fmt!r}")
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+
+
+class UserImporter:
+    def __init__(self, session_factory: Callable[[], Session], executor: Executor,
+                 chunk_size: int = 1000, error_report: Optional[TextIO] = None):
+        self.session_factory = session_factory
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.error_report = error_report
+        self.result = ImportResult()
+
+    def _report(self, line_no: int, email: Optional[str], error: str) -> None:
+        if self.error_report is not None:
+            self.error_report.write(json.dumps({"line": line_no, "email": email, "error": error}) + "\n")
+
+    def _fail(self, line_no: int, email: Optional[str], error: str) -> None:
+        self.result.failed += 1
+        self._report(line_no, email, error)
+
+    def _skip(self, line_no: int, email: str) -> None:
+        self.result.skipped += 1
+        self._report(line_no, email, "Email already registered")
+
+    def _process_chunk(self, chunk: list[tuple[int, object]]) -> None:
+        # Keyed by normalized email, so addresses differing only in case count as duplicates
+        valid: dict[str, tuple[int, UserRegistrationPayload]] = {}
+        for line_no, record in chunk:
+            self.result.rows += 1
+            if isinstance(record, Exception):
+                self._fail(line_no, None, f"Invalid record: {record}")
+                continue
+            if not isinstance(record, dict):
+                self._fail(line_no, None, "Invalid record: expected an object")
+                continue
+            try:
+                payload = UserRegistrationPayload(**record)
+            except ValidationError as e:
+                self._fail(line_no, record.get("email"), _validation_message(e))
+                continue
+            email = normalize_email(payload.email)
+            if email in valid:
+                self._skip(line_no, payload.email)
+                continue
+            valid[email] = (line_no, payload)
+
+        if not valid:
+            return
+
+        with self.session_factory() as session:
+            self._skip_existing(session, valid)
+            if not valid:
+                return
+
+            payloads = [payload for _, payload in valid.values()]
+            hashes = self.executor.map(hash_password_sync, [payload.password for payload in payloads],
+                                       chunksize=max(1, len(payloads) // 64))
+            rows = {
+                email: {"email": payload.email, "email_normalized": email,
+                        "full_name": payload.full_name, "hashed_password": hashed}
+                for (email, (_, payload)), hashed in zip(valid.items(), hashes)
+            }
+            while True:
+                try:
+                    session.execute(insert(User), list(rows.values()))
+                    session.commit()
+                    break
+                except IntegrityError:
+                    session.rollback()
+                    # Registered since the check above: report those rows and insert the rest
+                    remaining = len(valid)
+                    self._skip_existing(session, valid)
+                    if len(valid) == remaining:
+                        raise
+                    rows = {email: row for email, row in rows.items() if email in valid}
+                    if not rows:
+                        return
+            self.result.imported += len(rows)
+
+    def _skip_existing(self, session: Session, valid: dict[str, tuple[int, UserRegistrationPayload]]) -> None:
+        existing = set(session.execute(
+            select(User.email_normalized).where(User.email_normalized.in_(list(valid)))).scalars())
+        for email in existing:
+            line_no, payload = valid.pop(email)
+            self._skip(line_no, payload.email)
+
+    def run(self, records: Iterable[tuple[int, object]]) -> ImportResult:
+        started = time.perf_counter()
+        records = iter(records)
+        while chunk := list(itertools.islice(records, self.chunk_size)):
+            self._process_chunk(chunk)
+            elapsed = time.perf_counter() - started
+            logging.info(
+                f"Processed {self.result.rows} rows: {self.result.imported} imported, "
+                f"{self.result.skipped} skipped, {self.result.failed} failed "
+                f"({self.result.rows / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        self.result.seconds = time.perf_counter() - started
+        return self.result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users from a CSV or JSONL file.")
+    parser.add_argument("path", help="input file with email, full_name and password per row, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    parser.add_argument("--errors", default="import_errors.jsonl", help="per-row error report (JSONL)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv")
+    logging.basicConfig(level=logging.INFO)
+
+    source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+    with source, open(args.errors, "w", encoding="utf-8") as error_report, \
+            ProcessPoolExecutor(max_workers=args.workers) as executor:
+        importer = UserImporter(base.SessionLocal, executor, chunk_size=args.chunk_size, error_report=error_report)
+        result = importer.run(read_records(source, fmt))
+
+    logging.info(
+        f"Import finished in {result.seconds:.1f}s: {result.imported} imported, "
+        f"{result.skipped} skipped, {result.failed} failed; errors written to {args.errors}"
+    )
+    if result.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
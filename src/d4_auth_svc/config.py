@@ -1,11 +1,144 @@
 import os
+import tempfile
+from dataclasses import dataclass
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///:memory:")
+# Optional explicit async URL; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# Optional read replicas ("url1,url2"): marked read paths go round-robin to healthy ones, else to the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DATABASE_REPLICA_HEALTH_INTERVAL_SECONDS = float(os.getenv("DATABASE_REPLICA_HEALTH_INTERVAL_SECONDS", 5))
 SERVICE_PORT = os.getenv("SERVICE_PORT", 8000)
+# Server processes and uvicorn tuning; "auto" picks uvloop/httptools when installed
+SERVICE_WORKERS = max(1, int(os.getenv("SERVICE_WORKERS", 1)))
+SERVICE_LOOP = os.getenv("SERVICE_LOOP", "auto")
+SERVICE_HTTP = os.getenv("SERVICE_HTTP", "auto")
+SERVICE_KEEPALIVE_TIMEOUT = int(os.getenv("SERVICE_KEEPALIVE_TIMEOUT", 5))
+SERVICE_BACKLOG = int(os.getenv("SERVICE_BACKLOG", 2048))
+# Logging: JSON lines written by a background thread; records beyond the queue bound are dropped and counted
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Repeats of the same warning or error (call site and exception type) allowed per window; 0 disables the limit
+LOG_REPEAT_LIMIT = int(os.getenv("LOG_REPEAT_LIMIT", 10))
+LOG_REPEAT_WINDOW_SECONDS = float(os.getenv("LOG_REPEAT_WINDOW_SECONDS", 60))
+
+# Access token signing keys as "kid1:secret1,kid2:secret2"; new tokens use the active key
+TOKEN_SIGNING_KEYS = os.getenv("TOKEN_SIGNING_KEYS")
+TOKEN_ACTIVE_KEY_ID = os.getenv("TOKEN_ACTIVE_KEY_ID")
+# Access tokens are short-lived; sessions are kept alive by rotating refresh tokens
+ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS", 900))
+# Absolute lifetime of a login session and its refresh tokens
+REFRESH_TOKEN_TTL_SECONDS = int(os.getenv("REFRESH_TOKEN_TTL_SECONDS", 30 * 24 * 3600))
+# Cached per-user token epochs; a revoke-all made elsewhere is seen within the TTL
+TOKEN_EPOCH_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_EPOCH_CACHE_TTL_SECONDS", 5))
+TOKEN_EPOCH_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_EPOCH_CACHE_MAX_ENTRIES", 100000))
+
+# Request limits for batch token introspection
+INTROSPECT_MAX_TOKENS = int(os.getenv("INTROSPECT_MAX_TOKENS", 1000))
+INTROSPECT_MAX_TOKEN_LENGTH = int(os.getenv("INTROSPECT_MAX_TOKEN_LENGTH", 4096))
 
 # Configuration for external email service integration
 EMAIL_SERVICE_URL = os.getenv("EMAIL_SERVICE_URL")
 EMAIL_API_KEY = os.getenv("EMAIL_API_KEY")
+# Optional endpoint accepting {"messages": [...]}; enables batched delivery
+EMAIL_SERVICE_BATCH_URL = os.getenv("EMAIL_SERVICE_BATCH_URL")
+EMAIL_MAX_CONCURRENCY = int(os.getenv("EMAIL_MAX_CONCURRENCY", 4))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 3))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", 0.5))
+EMAIL_RETRY_MAX_DELAY = float(os.getenv("EMAIL_RETRY_MAX_DELAY", 30))
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", 10000))
+# Seconds allowed on shutdown to deliver messages still queued
+EMAIL_DRAIN_TIMEOUT = float(os.getenv("EMAIL_DRAIN_TIMEOUT", 10))
+
+# bcrypt cost for new hashes; logins transparently rehash passwords stored with another cost
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Password hashing worker pool per server process: "thread" or "process", sharing the cores between processes
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 1) // SERVICE_WORKERS)))
+
+# Sorted SHA-1 file built by d4_auth_svc_build_breached_passwords; unset disables the breach check
+BREACHED_PASSWORDS_FILE = os.getenv("BREACHED_PASSWORDS_FILE")
+
+# Login throttling: sliding-window attempt limits plus load shedding on hash queue depth (0 disables).
+# Limits are per node and split evenly between the server processes.
+LOGIN_THROTTLE_ENABLED = _env_bool("LOGIN_THROTTLE_ENABLED", True)
+LOGIN_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", 60))
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", 10))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 100))
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", 100000))
+LOGIN_MAX_HASH_QUEUE_DEPTH = int(os.getenv("LOGIN_MAX_HASH_QUEUE_DEPTH", 64))
+
+# Connection pool tuning (not applied to in-memory sqlite, which has no real pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+
+# Pragmas applied to every connection of a file-backed sqlite database
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# In-process revocation index sitting in front of token_blacklist
+REVOCATION_CACHE_MAX_ENTRIES = int(os.getenv("REVOCATION_CACHE_MAX_ENTRIES", 100000))
+REVOCATION_CACHE_FALSE_POSITIVE_RATE = float(os.getenv("REVOCATION_CACHE_FALSE_POSITIVE_RATE", 0.001))
+# Polling for revocations recorded by other processes; bounds how long they stay unseen (0 disables)
+REVOCATION_SYNC_INTERVAL_SECONDS = float(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", 1))
+# Re-read window behind the high-water mark for late commits and clock skew between hosts
+REVOCATION_SYNC_OVERLAP_SECONDS = float(os.getenv("REVOCATION_SYNC_OVERLAP_SECONDS", 5))
+# Logouts arriving within the window (or up to the batch size) share one blacklist transaction
+REVOCATION_BATCH_WINDOW_SECONDS = float(os.getenv("REVOCATION_BATCH_WINDOW_SECONDS", 0.002))
+REVOCATION_BATCH_MAX_SIZE = int(os.getenv("REVOCATION_BATCH_MAX_SIZE", 100))
+# Logins arriving within the window (or up to the batch size) share one transaction on the sessions table
+SESSION_BATCH_WINDOW_SECONDS = float(os.getenv("SESSION_BATCH_WINDOW_SECONDS", 0.002))
+SESSION_BATCH_MAX_SIZE = int(os.getenv("SESSION_BATCH_MAX_SIZE", 100))
+# Registrations arriving within the window (or up to the batch size) share one transaction on the users table
+REGISTRATION_BATCH_WINDOW_SECONDS = float(os.getenv("REGISTRATION_BATCH_WINDOW_SECONDS", 0.002))
+REGISTRATION_BATCH_MAX_SIZE = int(os.getenv("REGISTRATION_BATCH_MAX_SIZE", 100))
+
+# Expired token_blacklist cleanup; an interval of 0 disables the in-app sweeper
+TOKEN_SWEEP_INTERVAL_SECONDS = float(os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", 300))
+TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", 500))
+TOKEN_SWEEP_MAX_ROWS_PER_SECOND = float(os.getenv("TOKEN_SWEEP_MAX_ROWS_PER_SECOND", 5000))
+
+# Application factory: debug mode and the warmup done before /readyz reports ready.
+# APP_ENV=production is the deployment profile: debug (tracebacks in 500 responses) is off unless forced on.
+APP_ENV = os.getenv("APP_ENV", "development")
+APP_DEBUG = _env_bool("APP_DEBUG", APP_ENV != "production")
+# Response encoding: "orjson", "json" (stdlib) or "auto", which picks orjson when installed
+APP_JSON_RESPONSE = os.getenv("APP_JSON_RESPONSE", "auto")
+STARTUP_WARMUP = _env_bool("STARTUP_WARMUP", True)
+STARTUP_WARM_DB_CONNECTIONS = int(os.getenv("STARTUP_WARM_DB_CONNECTIONS", DB_POOL_SIZE))
+
+# Opt-in request profiling: requests carrying PROFILING_ADMIN_TOKEN in X-Profile-Token, plus a sampled share
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED", False)
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+# Captured profiles are kept as a ring of files; the oldest are deleted first
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "d4_auth_profiles"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", 50))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Per-application options for ``create_app``; defaults come from the environment."""
+
+    debug: bool = APP_DEBUG
+    warmup: bool = STARTUP_WARMUP
+    warm_db_connections: int = STARTUP_WARM_DB_CONNECTIONS
+    profiling: bool = PROFILING_ENABLED
+    json_response: str = APP_JSON_RESPONSE
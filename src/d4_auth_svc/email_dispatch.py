@@ -0,0 +1,194 @@
+"""In-process queue for outbound email.
+
+Handlers enqueue messages and return immediately; a small set of worker tasks
+deliver them through one shared keep-alive ``httpx.AsyncClient``. Failed
+deliveries are retried with exponential backoff and full jitter, and when a
+batch endpoint is configured queued messages are sent together. httpx is only
+imported once the dispatcher starts, keeping it off the import path.
+"""
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING, Optional
+
+from d4_auth_svc.config import (
+    EMAIL_SERVICE_URL,
+    EMAIL_SERVICE_BATCH_URL,
+    EMAIL_API_KEY,
+    EMAIL_MAX_CONCURRENCY,
+    EMAIL_BATCH_SIZE,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BASE_DELAY,
+    EMAIL_RETRY_MAX_DELAY,
+    EMAIL_QUEUE_SIZE,
+)
+from d4_auth_svc.metrics import timed_phase
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        url: Optional[str],
+        api_key: Optional[str] = None,
+        batch_url: Optional[str] = None,
+        max_concurrency: int = 4,
+        batch_size: int = 50,
+        max_attempts: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+        queue_size: int = 10000,
+        timeout: float = 10.0,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.batch_url = batch_url
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size if batch_url else 1
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.requests = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers) and self._loop is not None and not self._loop.is_closed()
+
+    async def start(self) -> None:
+        self._start()
+
+    def _start(self) -> None:
+        if self.running:
+            return
+        import httpx
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued messages (up to ``timeout`` seconds) and release the client."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Email queue not drained within {timeout}s; {self._queue.qsize()} messages dropped")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._client.aclose()
+        self._workers = []
+        self._client = None
+        self._queue = None
+        self._loop = None
+
+    def enqueue(self, message: dict) -> bool:
+        """Queue a message for delivery without waiting for it to be sent."""
+        if not self.running:
+            # Started lazily when the application lifespan has not run
+            self._start()
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logging.error(f"Email queue full; dropping message to {message.get('recipient')}")
+            return False
+        self.enqueued += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "requests": self.requests,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                logging.error(e, exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: list[dict]) -> None:
+        import httpx
+
+        if self.batch_url and len(batch) > 1:
+            url, body = self.batch_url, {"messages": batch}
+        else:
+            url, body = self.url, batch[0]
+
+        attempts = 0
+        for attempt in range(self.max_attempts):
+            attempts += 1
+            try:
+                self.requests += 1
+                with timed_phase("email_dispatch"):
+                    response = await self._client.post(url, json=body)
+                if response.is_success:
+                    self.sent += len(batch)
+                    return
+                logging.error(f"Email service responded with status code {response.status_code} on attempt {attempt + 1} of {self.max_attempts}")
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+            except httpx.HTTPError as e:
+                logging.error(e, exc_info=True)
+            if attempt + 1 < self.max_attempts:
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt))
+
+        self.failed += len(batch)
+        recipients = ", ".join(message.get("recipient", "?") for message in batch)
+        logging.error(f"Failed to send email to {recipients} after {attempts} attempts.")
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniformly random up to the capped exponential delay
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+
+email_dispatcher = EmailDispatcher(
+    EMAIL_SERVICE_URL,
+    api_key=EMAIL_API_KEY,
+    batch_url=EMAIL_SERVICE_BATCH_URL,
+    max_concurrency=EMAIL_MAX_CONCURRENCY,
+    batch_size=EMAIL_BATCH_SIZE,
+    max_attempts=EMAIL_MAX_ATTEMPTS,
+    retry_base_delay=EMAIL_RETRY_BASE_DELAY,
+    retry_max_delay=EMAIL_RETRY_MAX_DELAY,
+    queue_size=EMAIL_QUEUE_SIZE,
+)
@@ -0,0 +1,97 @@
+"""Group commit: many requests' writes share one transaction.
+
+Requests hand their write to a writer and wait for it. Writes are collected
+for up to ``window_seconds`` or ``max_batch`` entries and committed one batch
+at a time, so a burst costs one transaction (and one fsync, and on sqlite one
+turn at the database write lock) instead of one each. While a batch commits,
+the next one fills up. Subclasses implement ``_write_batch``, which returns a
+result per item in order; if it raises, every request in the batch gets the
+exception.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class _Pending:
+    item: Any
+    future: asyncio.Future
+
+
+class GroupCommitWriter(ABC):
+    def __init__(self, window_seconds: float, max_batch: int):
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self._pending: list[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.largest_batch = 0
+        self.errors = 0
+
+    async def submit(self, item) -> Any:
+        """Queue ``item`` for the next batch and return its result once committed."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_Pending(item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None and (self._writer is None or self._writer.done()):
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if (self._writer is not None and not self._writer.done()) or not self._pending:
+            # A running writer picks up whatever accumulates while it commits
+            return
+        self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        # One batch in flight at a time; the next one fills up meanwhile
+        try:
+            while self._pending:
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await self._write(batch)
+        finally:
+            self._writer = None
+
+    async def _write(self, batch: list[_Pending]) -> None:
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await self._write_batch([pending.item for pending in batch])
+        except Exception as e:
+            self.errors += 1
+            logging.error(e, exc_info=True)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending, result in zip(batch, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    @abstractmethod
+    async def _write_batch(self, items: list) -> list:
+        """Write ``items`` in one transaction; returns a result per item, in order."""
+
+    async def stop(self) -> None:
+        """Write whatever is still pending and wait for in-flight batches."""
+        self._flush()
+        if self._writer is not None:
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "errors": self.errors,
+        }
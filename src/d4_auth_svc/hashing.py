@@ -0,0 +1,184 @@
+"""Bounded worker pool for bcrypt password hashing.
+
+bcrypt is deliberately slow, so hashing and verification are submitted to a
+dedicated executor instead of running on the event loop. The pool keeps simple
+accounting (in-flight work, queue depth and time spent waiting for a worker)
+so it can be sized per node.
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import bcrypt
+
+from d4_auth_svc.config import BCRYPT_ROUNDS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS
+from d4_auth_svc.metrics import timed_phase
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def bcrypt_cost(hashed_password: str) -> Optional[int]:
+    """Cost factor encoded in a ``$2b$<cost>$...`` hash, or None if unparseable."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str, rounds: int) -> bool:
+    return bcrypt_cost(hashed_password) != rounds
+
+
+def _run_timed(fn: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    # Runs inside the worker; the start timestamp lets the caller measure queue wait.
+    # time.monotonic() is system-wide on Linux, so this also holds for process pools.
+    started_at = time.monotonic()
+    return started_at, fn(*args)
+
+
+class PasswordHasher:
+    def __init__(self, max_workers: int, kind: str = "thread", rounds: int = BCRYPT_ROUNDS):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unsupported password hash executor: {kind!r}")
+        if max_workers < 1:
+            raise ValueError("Password hash executor needs at least one worker")
+        self.max_workers = max_workers
+        self.kind = kind
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+
+        # Counters are only touched from the event loop, so no locking is needed.
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="password-hash")
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        submitted_at = time.monotonic()
+        self.in_flight += 1
+        self.submitted += 1
+        try:
+            started_at, result = await loop.run_in_executor(executor, _run_timed, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        finished_at = time.monotonic()
+        wait = max(0.0, started_at - submitted_at)
+        self.completed += 1
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.total_run_seconds += max(0.0, finished_at - started_at)
+        return result
+
+    async def hash_password(self, password: str) -> str:
+        with timed_phase("bcrypt_hash"):
+            return await self._submit(hash_password_sync, password, self.rounds)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        with timed_phase("bcrypt_verify"):
+            return await self._submit(verify_password_sync, password, hashed_password)
+
+    async def warm_up(self) -> None:
+        """Start every worker and load bcrypt in it before the first real request."""
+        await asyncio.gather(*(self._submit(hash_password_sync, "warm-up", 4) for _ in range(self.max_workers)))
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "rounds": self.rounds,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": self.total_wait_seconds / self.completed if self.completed else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+            "avg_run_seconds": self.total_run_seconds / self.completed if self.completed else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        # The executor is recreated lazily, so the hasher stays usable afterwards.
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            logging.info(f"Shutting down {self.kind} password hash executor")
+            executor.shutdown(wait=wait)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_EXECUTOR, BCRYPT_ROUNDS)
+
+
+def calibrate(target_seconds: float, min_rounds: int = 4, max_rounds: int = 16,
+              samples: int = 3) -> tuple[list[tuple[int, float]], int]:
+    """Measure hash latency per cost on this host.
+
+    Returns the (rounds, median seconds) measurements and the highest cost
+    whose latency fits the target budget (at least ``min_rounds``).
+    """
+    measurements = []
+    recommended = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        salt = bcrypt.gensalt(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            bcrypt.hashpw(b"calibration-password", salt)
+            timings.append(time.perf_counter() - started)
+        median = statistics.median(timings)
+        measurements.append((rounds, median))
+        if median <= target_seconds:
+            recommended = rounds
+        else:
+            # Every further step doubles the cost, so there is no point going on
+            break
+    return measurements, recommended
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend a bcrypt cost for a per-hash latency budget.")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="latency budget per hash")
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+
+    measurements, recommended = calibrate(args.target_ms / 1000, max_rounds=args.max_rounds, samples=args.samples)
+    for rounds, seconds in measurements:
+        print(f"rounds={rounds:2d}  {seconds * 1000:9.1f} ms  ~{1 / seconds:8.1f} hashes/s per core")
+    print(f"Recommended BCRYPT_ROUNDS={recommended} (current: {BCRYPT_ROUNDS}, budget {args.target_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
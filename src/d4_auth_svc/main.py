@@ -1,20 +1,38 @@
 import logging
 
 import uvicorn
-from d4_auth_svc.app import app
-from d4_auth_svc.config import SERVICE_PORT
+from d4_auth_svc.config import (
+    SERVICE_PORT,
+    SERVICE_WORKERS,
+    SERVICE_LOOP,
+    SERVICE_HTTP,
+    SERVICE_KEEPALIVE_TIMEOUT,
+    SERVICE_BACKLOG,
+)
+from d4_auth_svc.structured_logging import logging_config
 
-
-# Set up logging for the application
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def uvicorn_options() -> dict:
+    return {
+        "host": "0.0.0.0",
+        "port": int(SERVICE_PORT),
+        "workers": SERVICE_WORKERS,
+        "loop": SERVICE_LOOP,
+        "http": SERVICE_HTTP,
+        "timeout_keep_alive": SERVICE_KEEPALIVE_TIMEOUT,
+        "backlog": SERVICE_BACKLOG,
+        # Applied in every worker process: queue-backed JSON logging for the app and uvicorn
+        "log_config": logging_config(),
+    }
+
+
 def main():
-    service_port = int(SERVICE_PORT)
-    uvicorn.run(app, host="0.0.0.0", port=service_port)
+    # Passed as an import string so each worker process builds its own app
+    uvicorn.run("d4_auth_svc.app:app", **uvicorn_options())
 
 
 if __name__ == "__main__":
     # Entry point for the application
-    main()
\ No newline at end of file
+    main()
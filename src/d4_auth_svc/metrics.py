@@ -0,0 +1,265 @@
+"""Request and phase metrics in the Prometheus text exposition format.
+
+Counters and histograms keep one shard per recording thread. Recording is a
+thread-local lookup plus a couple of list/dict updates with no lock; the lock
+is only taken the first time a thread records, and shards are merged when
+/metrics is scraped. Component ``stats()`` dicts and pool status are exported
+as gauges at scrape time.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers in-process lookups through slow bcrypt costs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _ShardedMetric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _snapshots(self) -> list[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict.copy() is a single C call, so it cannot see a half-applied insert
+        return [shard.copy() for shard in shards]
+
+    def reset(self) -> None:
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_ShardedMetric):
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        totals: dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_ShardedMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Labels = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> dict[Labels, tuple[list[int], float]]:
+        """Per label set: cumulative bucket counts (last is +Inf, i.e. the count) and the sum."""
+        merged: dict[Labels, list] = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                counts = list(counts)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = counts
+                else:
+                    for i, count in enumerate(counts):
+                        total[i] += count
+        result = {}
+        for labels, counts in merged.items():
+            cumulative, running = [], 0
+            for count in counts[:-1]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, counts[-1])
+        return result
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        label_names = self.label_names + ("le",)
+        for labels, (cumulative, total) in sorted(self.values().items()):
+            for bound, count in zip(self.buckets + (math.inf,), cumulative):
+                lines.append(f"{self.name}_bucket{_format_labels(label_names, labels + (_format_value(bound),))} {count}")
+            suffix = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self, prefix: str = "d4_auth"):
+        self.prefix = prefix
+        self._metrics: list[_ShardedMetric] = []
+        self._stats: list[tuple[str, Callable[[], dict], Optional[tuple[str, str]]]] = []
+
+    def counter(self, name: str, documentation: str, label_names: Labels = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Labels = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, component: str, stats: Callable[[], dict], label: Optional[tuple[str, str]] = None) -> None:
+        """Export the numeric values of ``stats()`` as ``<prefix>_<component>_<key>`` gauges."""
+        self._stats.append((component, stats, label))
+
+    def _render_stats(self) -> list[str]:
+        gauges: dict[str, list[str]] = {}
+        for component, stats, label in self._stats:
+            try:
+                values = stats()
+            except Exception as e:
+                # A broken exporter must not take the whole scrape down
+                logging.error(e, exc_info=True)
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.prefix}_{component}_{key}"
+                labels = _format_labels((label[0],), (label[1],)) if label else ""
+                gauges.setdefault(name, []).append(f"{name}{labels} {_format_value(value)}")
+        lines = []
+        for name, samples in gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_stats())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+phase_seconds = registry.histogram(
+    "phase_duration_seconds", "Time spent in hot request phases.", ("phase",))
+
+# Set while a request is being profiled; collects that request's phase timings
+request_phases: ContextVar[Optional[dict]] = ContextVar("request_phases", default=None)
+
+
+class timed_phase:
+    """Context manager recording the wall time of a request phase."""
+
+    __slots__ = ("labels", "started")
+
+    def __init__(self, phase: str):
+        self.labels = (phase,)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        phase_seconds.observe(elapsed, self.labels)
+        phases = request_phases.get()
+        if phases is not None:
+            phases[self.labels[0]] = phases.get(self.labels[0], 0.0) + elapsed
+        return False
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them per route template.
+
+    Requests that match no route are grouped under ``unmatched`` so arbitrary
+    paths cannot blow up label cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_request_seconds.observe(time.perf_counter() - started, (method, path))
+            http_requests.inc((method, path, str(status_code)))
@@ -1,3 +1,4 @@
 from .base import Base
 from .user import *
 from .token_blacklist import TokenBlacklist
+from .session import AuthSession
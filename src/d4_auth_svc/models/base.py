@@ -1,19 +1,296 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional
+
 from sqlalchemy import Column, PrimaryKeyConstraint, String
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import scoped_session, sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
-from d4_auth_svc.config import DATABASE_URL
+from d4_auth_svc.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    DATABASE_REPLICA_HEALTH_INTERVAL_SECONDS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+)
 
 Base = declarative_base()
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    async_driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if async_driver is None:
+        raise ValueError(f"No async driver known for database backend {parsed.get_backend_name()!r}")
+    return parsed.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+class _CheckoutTimingMixin:
+    """Records how long callers wait to check a connection out of the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timing_lock = threading.Lock()
+        self.checkout_count = 0
+        self.total_checkout_wait = 0.0
+        self.max_checkout_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - started
+            with self._timing_lock:
+                self.checkout_count += 1
+                self.total_checkout_wait += wait
+                self.max_checkout_wait = max(self.max_checkout_wait, wait)
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _engine_options(url: str, poolclass: type[Pool]) -> dict:
+    if is_memory_sqlite(url):
+        # An in-memory database lives inside a single connection, so the
+        # dialect's default pool is kept and sizing options do not apply.
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    db_engine = create_engine(url, **_engine_options(url, TimedQueuePool))
+    if make_url(url).get_backend_name() == "sqlite" and not is_memory_sqlite(url):
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    db_engine = create_async_engine(url, **_engine_options(url, TimedAsyncAdaptedQueuePool))
+    if make_url(url).get_backend_name() == "sqlite" and not is_memory_sqlite(url):
+        event.listen(db_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+
+def pool_status(pool: Pool) -> dict:
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, _CheckoutTimingMixin):
+        status.update(
+            checkouts=pool.checkout_count,
+            avg_checkout_wait_seconds=pool.total_checkout_wait / pool.checkout_count if pool.checkout_count else 0.0,
+            max_checkout_wait_seconds=pool.max_checkout_wait,
+        )
+    return status
+
+
+# Passed as bind_arguments by read paths that tolerate replication lag
+REPLICA_READ = {"replica": True}
+
+
+class ReplicaSet:
+    """Read replicas used round-robin; one failing a health check is skipped until it passes again."""
+
+    def __init__(self, urls: list[str], health_interval_seconds: float = DATABASE_REPLICA_HEALTH_INTERVAL_SECONDS):
+        self.engines = [create_async_db_engine(to_async_url(url)) for url in urls]
+        self.healthy = [True] * len(self.engines)
+        self.health_interval_seconds = health_interval_seconds
+        self._next = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+        self.reads = [0] * len(self.engines)
+        self.primary_fallbacks = 0
+        self.health_checks = 0
+        for index, replica in enumerate(self.engines):
+            event.listen(replica.sync_engine, "handle_error", partial(self._on_error, index))
+
+    def _on_error(self, index: int, context) -> None:
+        # Lost or refused connections take the replica out until the next passing check
+        if context.is_disconnect or context.connection is None:
+            self.set_healthy(index, False)
+
+    def set_healthy(self, index: int, healthy: bool) -> None:
+        if self.healthy[index] != healthy:
+            logging.warning(f"Read replica {index} is now {'healthy' if healthy else 'unhealthy'}")
+        self.healthy[index] = healthy
+
+    def pick(self) -> Optional[Engine]:
+        """The next healthy replica's engine, or None when reads should go to the primary."""
+        if not self.engines:
+            return None
+        start = next(self._next)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if self.healthy[index]:
+                self.reads[index] += 1
+                return self.engines[index].sync_engine
+        self.primary_fallbacks += 1
+        return None
+
+    async def check_health(self) -> None:
+        self.health_checks += 1
+        for index, replica in enumerate(self.engines):
+            try:
+                async with replica.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except Exception:
+                self.set_healthy(index, False)
+            else:
+                self.set_healthy(index, True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval_seconds)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logging.error(e, exc_info=True)
+
+    async def start(self) -> None:
+        if not self.engines or self.health_interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        await self.check_health()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        stats = {"primary_fallbacks": self.primary_fallbacks, "health_checks": self.health_checks}
+        for index, (healthy, reads) in enumerate(zip(self.healthy, self.reads)):
+            stats[f"replica{index}_healthy"] = healthy
+            stats[f"replica{index}_reads"] = reads
+        return stats
+
+
+class RoutingSession(Session):
+    """Sends reads marked with REPLICA_READ to a replica, everything else to the primary.
+
+    Once the session has written (a flush or a DML statement), later reads
+    stay on the primary, so a request sees its own commits. Reads a replica
+    did answer are flagged in ``info["replica_read"]``.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+        elif replica and not self.info.get("wrote"):
+            replica_engine = _lazy("replicas").pick()
+            if replica_engine is not None:
+                self.info["replica_read"] = True
+                return replica_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+# The process-wide engines and session factories are created on first use
+# rather than at import, so importing the app stays cheap and no driver is
+# loaded or connection pool built until something needs the database.
+_LAZY_ATTRIBUTES: dict[str, Callable[[], Any]] = {
+    # Synchronous engine, kept for Alembic, scripts and the test suite
+    "engine": lambda: create_db_engine(DATABASE_URL),
+    "SessionLocal": lambda: sessionmaker(bind=_lazy("engine")),
+    # Asynchronous engine used by the request handlers
+    "async_engine": lambda: create_async_db_engine(ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)),
+    "AsyncSessionLocal": lambda: async_sessionmaker(bind=_lazy("async_engine"), sync_session_class=RoutingSession,
+                                                    expire_on_commit=False),
+    # Read replicas for the routing session; empty unless DATABASE_REPLICA_URLS is set
+    "replicas": lambda: ReplicaSet(DATABASE_REPLICA_URLS),
+}
+_lazy_lock = threading.RLock()
+
+
+def _lazy(name: str) -> Any:
+    # Module globals win, so assigned (or monkeypatched) values are honoured
+    value = globals().get(name)
+    if value is None:
+        with _lazy_lock:
+            value = globals().get(name)
+            if value is None:
+                value = globals()[name] = _LAZY_ATTRIBUTES[name]()
+    return value
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        return _lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_pool_stats() -> dict:
+    """Current occupancy and checkout wait of the process-wide pools."""
+    return {
+        "sync": pool_status(_lazy("engine").pool),
+        "async": pool_status(_lazy("async_engine").sync_engine.pool),
+    }
 
 
 def get_db() -> Session:
-    session = scoped_session(sessionmaker(bind=engine))
+    session = _lazy("SessionLocal")()
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with _lazy("AsyncSessionLocal")() as session:
+        yield session
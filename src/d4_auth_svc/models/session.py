@@ -0,0 +1,26 @@
+import datetime
+
+from sqlalchemy import Column, ForeignKey, Integer, String, TIMESTAMP
+from .base import Base
+
+class AuthSession(Base):
+    """A login session; its refresh token is rotated on every /auth/refresh."""
+
+    __tablename__ = "sessions"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # SHA-256 of the current refresh token secret
+    refresh_token_hash = Column(String(64), nullable=False)
+    # SHA-256 of the secret it replaced; presenting that one again counts as reuse
+    previous_refresh_token_hash = Column(String(64), nullable=True)
+    generation = Column(Integer, nullable=False, default=0)
+    # The user's token_epoch at login; the session ends once the epoch moves on
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(TIMESTAMP, nullable=False, default=datetime.datetime.utcnow)
+    last_refreshed_at = Column(TIMESTAMP, nullable=True)
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+    revoked_at = Column(TIMESTAMP, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<AuthSession(id={self.id}, user_id={self.user_id}, expires_at={self.expires_at})>"
@@ -1,11 +1,33 @@
-from sqlalchemy import Column, String, TIMESTAMP
+import datetime
+import hashlib
+from typing import Optional
+
+from sqlalchemy import Column, LargeBinary, TIMESTAMP
+from sqlalchemy.dialects import mysql
 from d4_auth_svc.models.base import Base
 
+DIGEST_SIZE = 32
+
+
+def digest_token(token: str) -> bytes:
+    """The key a token is revoked under; the raw bearer token is never stored."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
 class TokenBlacklist(Base):
     __tablename__ = 'token_blacklist'
 
-    token = Column(String, primary_key=True, nullable=False)
-    expires_at = Column(TIMESTAMP, nullable=False)
+    # SHA-256 of the token: a fixed-width key, and no live credentials at rest
+    token_digest = Column(LargeBinary(DIGEST_SIZE).with_variant(mysql.BINARY(DIGEST_SIZE), "mysql", "mariadb"),
+                          primary_key=True, nullable=False)
+    expires_at = Column(TIMESTAMP, nullable=False, index=True)
+    # High-water mark other server processes poll to pick up new revocations
+    revoked_at = Column(TIMESTAMP, nullable=True, index=True, default=datetime.datetime.utcnow)
+
+    def __init__(self, token: Optional[str] = None, **kwargs):
+        if token is not None:
+            kwargs["token_digest"] = digest_token(token)
+        super().__init__(**kwargs)
 
     def __repr__(self) -> str:
-        return f"<TokenBlacklist(token={self.token}, expires_at={self.expires_at})>"
\ No newline at end of file
+        return f"<TokenBlacklist(token_digest={self.token_digest.hex()}, expires_at={self.expires_at})>"
@@ -1,13 +1,35 @@
 from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import validates
 from .base import Base
 
+
+def normalize_email(email: str) -> str:
+    """The form users are looked up and kept unique by: addresses differing only in case are one account."""
+    return email.strip().lower()
+
+
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
+    # The primary key is already indexed; a second index on it only slows inserts
+    id = Column(Integer, primary_key=True)
+    email = Column(String, nullable=False)
+    # Lowercased in Python rather than with SQL lower(), which sqlite only applies to ASCII
+    email_normalized = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Bumped to revoke every token and session the user holds
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @validates("email")
+    def _normalize(self, key: str, email: str) -> str:
+        self.email_normalized = normalize_email(email)
+        return email
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, email='{self.email}', full_name='{self.full_name}')>"
+
+
+def email_matches(email: str):
+    """Filter finding a user by email through the unique index on email_normalized."""
+    return User.email_normalized == normalize_email(email)
@@ -0,0 +1,199 @@
+"""Opt-in per-request profiling.
+
+With profiling enabled, a request is profiled when it carries the admin
+token in ``X-Profile-Token`` or is picked at PROFILING_SAMPLE_RATE. It runs
+under cProfile, and the time it spends in each hot phase (bcrypt, user
+lookup, blacklist insert, ...) is recorded for that request alone. Each
+capture is written to PROFILING_DIR as a pstats dump (``python -m pstats``,
+snakeviz) next to a JSON summary; the directory is a ring of at most
+PROFILING_MAX_PROFILES captures, oldest deleted first. Profiled responses
+carry ``X-Profile-Id``, and captures are listed and downloaded through
+/debug/profiles.
+
+cProfile only sees the event loop thread: work handed to the bcrypt pool
+shows up as time waiting in the loop, which the phase timings break down.
+One request is profiled at a time per process, and requests running
+concurrently on the loop appear in its trace. When profiling is disabled
+the middleware is not installed at all.
+"""
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+from typing import Optional
+
+from d4_auth_svc.config import (
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_DIR,
+    PROFILING_MAX_PROFILES,
+)
+from d4_auth_svc.metrics import request_phases
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_PATTERN = re.compile(r"^\d{16}-[0-9a-f]{8}$")
+# Downloading a capture is never itself profiled
+EXCLUDED_PREFIX = "/debug/profiles"
+
+
+class ProfileStore:
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max(1, max_profiles)
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}{suffix}")
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, summary: dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, ".prof"))
+        # The summary is written last; listings only show captures that have one
+        with open(self._path(profile_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f)
+        self._trim()
+
+    def _ids(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        # Ids start with a microsecond timestamp, so they sort oldest first
+        return sorted(name[:-5] for name in names if name.endswith(".json") and PROFILE_ID_PATTERN.match(name[:-5]))
+
+    def _trim(self) -> None:
+        ids = self._ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_profiles)]:
+            for suffix in (".json", ".prof"):
+                try:
+                    os.unlink(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    # Trimmed by another server process sharing the directory
+                    pass
+
+    def list(self) -> list[dict]:
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, ".json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, ".prof")
+        return path if os.path.exists(path) else None
+
+
+class RequestProfiler:
+    def __init__(self, store: ProfileStore, admin_token: Optional[str], sample_rate: float):
+        self.store = store
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self._active = False
+
+        self.profiled = 0
+        self.skipped_busy = 0
+        self.errors = 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    def wants(self, scope) -> bool:
+        if scope["path"].startswith(EXCLUDED_PREFIX):
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode("ascii"):
+                return self.is_admin(value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def stats(self) -> dict:
+        return {
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "errors": self.errors,
+        }
+
+
+def new_profile_id() -> str:
+    return f"{time.time_ns() // 1000:016d}-{secrets.token_hex(4)}"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running selected requests under cProfile."""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+        if self.profiler._active:
+            self.profiler.skipped_busy += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"x-profile-id", profile_id.encode("ascii"))]}
+            await send(message)
+
+        phases = {}
+        phases_token = request_phases.set(phases)
+        profiler = cProfile.Profile()
+        self.profiler._active = True
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            self.profiler._active = False
+            request_phases.reset(phases_token)
+
+            route = scope.get("route")
+            summary = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None) or "unmatched",
+                "status": status_code,
+                "started_at": time.time() - elapsed,
+                "duration_seconds": elapsed,
+                "phases": phases,
+                "pid": os.getpid(),
+            }
+            try:
+                # Off the event loop; dumping stats does file I/O
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.profiler.store.save, profile_id, profiler, summary)
+                self.profiler.profiled += 1
+            except Exception as e:
+                self.profiler.errors += 1
+                logging.error(e, exc_info=True)
+
+
+request_profiler = RequestProfiler(
+    ProfileStore(PROFILING_DIR, PROFILING_MAX_PROFILES),
+    PROFILING_ADMIN_TOKEN,
+    PROFILING_SAMPLE_RATE,
+)
@@ -0,0 +1,208 @@
+"""In-process index of revoked tokens in front of the token_blacklist table.
+
+A Bloom filter answers the common "not revoked" case without touching the
+database, and an exact map of token digest -> expires_at confirms positives.
+Tokens are keyed by the same SHA-256 digest as token_blacklist, which also
+serves as the filter's hash. The map is bounded; once it overflows, Bloom
+positives that are not in the map fall back to a primary-key lookup instead
+of being trusted.
+
+Each server process has its own cache. Revocations recorded by other
+processes are pulled in by polling ``token_blacklist.revoked_at`` past a
+high-water mark (see ``revocation_sync``).
+"""
+import datetime
+import logging
+import math
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.config import REVOCATION_CACHE_MAX_ENTRIES, REVOCATION_CACHE_FALSE_POSITIVE_RATE
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.base import REPLICA_READ
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        # Double hashing (Kirsch-Mitzenmacher) over the first 128 bits of a uniform digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: bytes) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+
+class RevocationCache:
+    def __init__(self, max_entries: int = 100_000, error_rate: float = 0.001):
+        self.max_entries = max_entries
+        self.error_rate = error_rate
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything; a cold cache defers every check to the database."""
+        self.warm = False
+        self.overflowed = False
+        self.high_water_mark: Optional[datetime.datetime] = None
+        self._bloom = BloomFilter(self.max_entries, self.error_rate)
+        self._entries: dict[bytes, datetime.datetime] = {}
+        # Expired digests whose Bloom bits stay set until the filter is rebuilt
+        self._expired: set[bytes] = set()
+        self.hits = 0
+        self.misses = 0
+        self.false_positives = 0
+        self.db_lookups = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, token: str, expires_at: datetime.datetime) -> None:
+        self._add(digest_token(token), expires_at)
+
+    def _add(self, digest: bytes, expires_at: datetime.datetime) -> None:
+        self._bloom.add(digest)
+        self._expired.discard(digest)
+        if digest not in self._entries and len(self._entries) >= self.max_entries:
+            self._drop_expired(datetime.datetime.utcnow())
+            if len(self._entries) >= self.max_entries:
+                # Still tracked by the Bloom filter; positives go to the database
+                self.overflowed = True
+                return
+        self._entries[digest] = expires_at
+
+    def check(self, token: str, now: Optional[datetime.datetime] = None) -> Optional[bool]:
+        """True if revoked, False if not, None if only the database can tell."""
+        return self.check_digest(digest_token(token), now)
+
+    def check_digest(self, digest: bytes, now: Optional[datetime.datetime] = None) -> Optional[bool]:
+        if not self.warm:
+            return None
+        if digest not in self._bloom:
+            self.misses += 1
+            return False
+        expires_at = self._entries.get(digest)
+        if expires_at is not None:
+            if expires_at > (now or datetime.datetime.utcnow()):
+                self.hits += 1
+                return True
+            # The token has expired on its own; its revocation no longer matters
+            self._forget(digest)
+            self.misses += 1
+            return False
+        if digest in self._expired:
+            # Still set in the filter, but known and expired: a miss, not a false positive
+            self.misses += 1
+            return False
+        if self.overflowed:
+            return None
+        self.false_positives += 1
+        return False
+
+    async def is_revoked(self, token: str, db: AsyncSession) -> bool:
+        digest = digest_token(token)
+        cached = self.check_digest(digest)
+        if cached is not None:
+            return cached
+        self.db_lookups += 1
+        with timed_phase("blacklist_lookup"):
+            # Replica lag only widens the window revocation_sync already has
+            result = await db.execute(select(TokenBlacklist.expires_at).where(TokenBlacklist.token_digest == digest),
+                                      bind_arguments=REPLICA_READ)
+        expires_at = result.scalar_one_or_none()
+        if expires_at is None:
+            return False
+        if self.warm:
+            self._add(digest, expires_at)
+        return True
+
+    def _drop_expired(self, now: datetime.datetime) -> int:
+        expired = [digest for digest, expires_at in self._entries.items() if expires_at <= now]
+        for digest in expired:
+            self._forget(digest)
+        return len(expired)
+
+    def _forget(self, digest: bytes) -> None:
+        del self._entries[digest]
+        # Bounded like the map; past that, later checks of the digest count as false positives
+        if len(self._expired) < self.max_entries:
+            self._expired.add(digest)
+
+    def purge_expired(self, now: Optional[datetime.datetime] = None) -> int:
+        purged = self._drop_expired(now or datetime.datetime.utcnow())
+        if self._bloom.saturated and not self.overflowed:
+            # Every live revocation is in the map, so the filter can be rebuilt from it
+            self._bloom = BloomFilter(self.max_entries, self.error_rate)
+            for digest in self._entries:
+                self._bloom.add(digest)
+            self._expired.clear()
+        return purged
+
+    async def warm_from(self, db: AsyncSession) -> int:
+        """Load unexpired revocations from token_blacklist and start answering checks."""
+        now = datetime.datetime.utcnow()
+        result = await db.execute(
+            select(TokenBlacklist.token_digest, TokenBlacklist.expires_at).where(TokenBlacklist.expires_at > now)
+        )
+        self.reset()
+        for digest, expires_at in result:
+            self._add(digest, expires_at)
+        self.warm = True
+        self.high_water_mark = now
+        logging.info(f"Revocation cache warmed with {len(self._entries)} tokens")
+        return len(self._entries)
+
+    async def sync_from(self, db: AsyncSession, overlap_seconds: float) -> int:
+        """Add revocations recorded since the high-water mark; returns how many were new."""
+        if not self.warm:
+            # A cold cache already defers every check to the database
+            return 0
+        now = datetime.datetime.utcnow()
+        since = self.high_water_mark - datetime.timedelta(seconds=overlap_seconds)
+        result = await db.execute(
+            select(TokenBlacklist.token_digest, TokenBlacklist.expires_at, TokenBlacklist.revoked_at)
+            .where(TokenBlacklist.revoked_at > since, TokenBlacklist.expires_at > now)
+        )
+        added = 0
+        for digest, expires_at, revoked_at in result:
+            # The overlap window re-reads recent rows; skip the ones already known
+            known = digest in self._entries or (self.overflowed and digest in self._bloom)
+            if not known:
+                self._add(digest, expires_at)
+                added += 1
+            self.high_water_mark = max(self.high_water_mark, revoked_at)
+        return added
+
+    def stats(self) -> dict:
+        return {
+            "warm": self.warm,
+            "overflowed": self.overflowed,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "false_positives": self.false_positives,
+            "db_lookups": self.db_lookups,
+        }
+
+
+revocation_cache = RevocationCache(REVOCATION_CACHE_MAX_ENTRIES, REVOCATION_CACHE_FALSE_POSITIVE_RATE)
@@ -0,0 +1,71 @@
+"""Keeps the per-process revocation cache in step with other server processes.
+
+Every server process answers revocation checks from its own in-memory cache,
+so a logout handled by one process has to reach the others. Each process
+polls token_blacklist for rows whose ``revoked_at`` is past its high-water
+mark; a revocation therefore takes effect everywhere within one polling
+interval. The query is a range scan on an indexed column and usually returns
+nothing.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from d4_auth_svc.config import REVOCATION_SYNC_INTERVAL_SECONDS, REVOCATION_SYNC_OVERLAP_SECONDS
+from d4_auth_svc.models import base
+from d4_auth_svc.revocation_cache import RevocationCache, revocation_cache
+
+
+class RevocationSync:
+    def __init__(self, cache: RevocationCache, interval_seconds: float, overlap_seconds: float):
+        self.cache = cache
+        self.interval_seconds = interval_seconds
+        self.overlap_seconds = overlap_seconds
+        self._task: Optional[asyncio.Task] = None
+
+        self.syncs = 0
+        self.tokens_synced = 0
+        self.errors = 0
+        self.last_seconds = 0.0
+
+    async def sync_once(self) -> int:
+        started = time.perf_counter()
+        async with base.AsyncSessionLocal() as session:
+            added = await self.cache.sync_from(session, self.overlap_seconds)
+        self.syncs += 1
+        self.tokens_synced += added
+        self.last_seconds = time.perf_counter() - started
+        return added
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sync_once()
+            except Exception as e:
+                self.errors += 1
+                logging.error(e, exc_info=True)
+
+    async def start(self) -> None:
+        if self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "syncs": self.syncs,
+            "tokens_synced": self.tokens_synced,
+            "errors": self.errors,
+            "last_seconds": self.last_seconds,
+        }
+
+
+revocation_sync = RevocationSync(revocation_cache, REVOCATION_SYNC_INTERVAL_SECONDS, REVOCATION_SYNC_OVERLAP_SECONDS)
@@ -0,0 +1,109 @@
+"""Group commit for token revocations.
+
+A logout used to insert and commit its own token_blacklist row, so a burst of
+logouts cost one transaction (and one fsync) each. Revocations are instead
+group committed (see ``group_commit``): one transaction inserts a batch with a
+multi-row insert-or-ignore, ends the sessions of the rows it actually wrote
+and commits once. Each waiting request is then told whether its token was
+newly revoked. Where the dialect can return rows from an executemany INSERT
+(sqlite 3.35+, PostgreSQL), that answer comes from RETURNING, so a token
+revoked by another process in the meantime is never reported twice; elsewhere
+the batch first selects which tokens are already revoked.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import insert, select, update
+
+from d4_auth_svc.config import REVOCATION_BATCH_WINDOW_SECONDS, REVOCATION_BATCH_MAX_SIZE
+from d4_auth_svc.group_commit import GroupCommitWriter
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models import base
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+
+
+def insert_or_ignore(dialect_name: str, table):
+    """An INSERT that skips rows whose primary key already exists, or None if the dialect has none."""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert(table).on_conflict_do_nothing()
+    if dialect_name in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+    return None
+
+
+@dataclass
+class PendingRevocation:
+    digest: bytes
+    expires_at: datetime.datetime
+    session_id: Optional[str]
+
+
+class RevocationWriter(GroupCommitWriter):
+    def __init__(self, window_seconds: float, max_batch: int):
+        super().__init__(window_seconds, max_batch)
+        self.revocations = 0
+        self.duplicates = 0
+
+    async def revoke(self, token: str, expires_at: datetime.datetime, session_id: Optional[str] = None) -> bool:
+        """Blacklist ``token`` (and end ``session_id``); False if it was already revoked."""
+        return await self.submit(PendingRevocation(digest_token(token), expires_at, session_id))
+
+    async def _write_batch(self, batch: list[PendingRevocation]) -> list[bool]:
+        now = datetime.datetime.utcnow()
+        rows = {}
+        for pending in batch:
+            rows.setdefault(pending.digest, {"token_digest": pending.digest, "expires_at": pending.expires_at,
+                                             "revoked_at": now, "session_id": pending.session_id})
+        self.revocations += len(batch)
+        self.duplicates += len(batch) - len(rows)
+
+        with timed_phase("blacklist_insert"):
+            async with base.AsyncSessionLocal() as session:
+                async with session.begin():
+                    dialect = session.bind.dialect
+                    statement = insert_or_ignore(dialect.name, TokenBlacklist.__table__)
+                    if statement is not None and dialect.insert_executemany_returning:
+                        # Conflicting rows are skipped and not returned, whoever inserted them
+                        inserted = set(await session.scalars(
+                            statement.returning(TokenBlacklist.__table__.c.token_digest), self._values(rows.values())
+                        ))
+                    else:
+                        existing = set(await session.scalars(
+                            select(TokenBlacklist.token_digest).where(TokenBlacklist.token_digest.in_(list(rows)))
+                        ))
+                        inserted = set(rows) - existing
+                        if inserted:
+                            if statement is None:
+                                # Rows found above are already filtered out; a concurrent insert aborts the batch
+                                statement = insert(TokenBlacklist.__table__)
+                            await session.execute(statement, self._values(rows[digest] for digest in inserted))
+                    # End the sessions too, so their refresh tokens cannot mint new access tokens
+                    session_ids = [rows[digest]["session_id"] for digest in inserted if rows[digest]["session_id"]]
+                    if session_ids:
+                        await session.execute(
+                            update(AuthSession)
+                            .where(AuthSession.id.in_(session_ids), AuthSession.revoked_at.is_(None))
+                            .values(revoked_at=now)
+                        )
+        results = []
+        for pending in batch:
+            # The first request for a token wins; repeats within the batch see it as already revoked
+            results.append(pending.digest in inserted)
+            inserted.discard(pending.digest)
+        return results
+
+    @staticmethod
+    def _values(rows) -> list[dict]:
+        return [{key: row[key] for key in ("token_digest", "expires_at", "revoked_at")} for row in rows]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "revocations": self.revocations, "duplicates": self.duplicates}
+
+
+revocation_writer = RevocationWriter(REVOCATION_BATCH_WINDOW_SECONDS, REVOCATION_BATCH_MAX_SIZE)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+router = APIRouter()
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    # Liveness: the process is up and serving its event loop
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    # Readiness: startup warmup has finished and shutdown has not begun
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Not ready")
+    return {"status": "ready"}
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from d4_auth_svc.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Text exposition format for Prometheus scrapes
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
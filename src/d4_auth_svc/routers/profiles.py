@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from d4_auth_svc.profiling import PROFILE_HEADER, request_profiler
+
+router = APIRouter()
+
+
+def require_admin(request: Request) -> None:
+    # Captures expose code paths and timings; only the profiling admin token may read them
+    if not request_profiler.is_admin(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+@router.get("/debug/profiles", include_in_schema=False)
+async def list_profiles(request: Request):
+    require_admin(request)
+    return {"profiles": request_profiler.store.list()}
+
+
+@router.get("/debug/profiles/{profile_id}", include_in_schema=False)
+async def download_profile(profile_id: str, request: Request):
+    require_admin(request)
+    path = request_profiler.store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    # A pstats dump: python -m pstats <file>, or snakeviz
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -0,0 +1,48 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.models.base import get_async_db
+from d4_auth_svc.revocation_cache import revocation_cache
+from d4_auth_svc.token_epochs import bump_token_epoch, subject_id, user_epochs
+from d4_auth_svc.tokens import ExpiredTokenError, TokenError, token_signer
+
+router = APIRouter()
+
+
+@router.post("/revoke-all")
+async def revoke_all(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Extract Authorization header
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=400, detail="Missing or malformed Authorization header")
+
+    token = auth_header.split(" ")[1]
+
+    try:
+        claims = token_signer.decode(token)
+    except ExpiredTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
+    except TokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    user_id = subject_id(claims)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    try:
+        if await revocation_cache.is_revoked(token, db) or not await user_epochs.is_current(claims, db):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+        # One UPDATE ends every token and session of the user, however many there are
+        if not await bump_token_epoch(db, user_id):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    return {"message": "All tokens and sessions revoked"}
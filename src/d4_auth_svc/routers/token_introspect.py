@@ -0,0 +1,117 @@
+import logging
+import time
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.config import INTROSPECT_MAX_TOKENS, INTROSPECT_MAX_TOKEN_LENGTH
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.base import get_async_db
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+from d4_auth_svc.revocation_cache import revocation_cache
+from d4_auth_svc.token_epochs import subject_id, user_epochs
+from d4_auth_svc.tokens import ExpiredTokenError, TokenError, token_signer
+
+router = APIRouter()
+
+STATUSES = ("valid", "expired", "revoked", "malformed")
+
+
+class IntrospectRequest(BaseModel):
+    tokens: list[Annotated[str, Field(max_length=INTROSPECT_MAX_TOKEN_LENGTH)]] = Field(
+        ..., min_length=1, max_length=INTROSPECT_MAX_TOKENS
+    )
+
+
+class IntrospectionStats:
+    def __init__(self):
+        self.batches = 0
+        self.tokens = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.statuses = dict.fromkeys(STATUSES, 0)
+
+    def record(self, results: list[dict], seconds: float) -> None:
+        self.batches += 1
+        self.tokens += len(results)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for result in results:
+            self.statuses[result["status"]] += 1
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "tokens": self.tokens,
+            "avg_batch_seconds": self.total_seconds / self.batches if self.batches else 0.0,
+            "max_batch_seconds": self.max_seconds,
+            **{f"status_{name}": count for name, count in self.statuses.items()},
+        }
+
+
+introspection_stats = IntrospectionStats()
+
+
+@router.post("/introspect")
+async def introspect(payload: IntrospectRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    started = time.perf_counter()
+
+    # Signature and expiry are checked in-process first
+    decoded = []
+    authentic = set()
+    for token in payload.tokens:
+        try:
+            decoded.append(("valid", token_signer.decode(token)))
+            authentic.add(token)
+        except ExpiredTokenError:
+            decoded.append(("expired", None))
+        except TokenError:
+            decoded.append(("malformed", None))
+
+    revoked = set()
+    unresolved = {}
+    for token in authentic:
+        digest = digest_token(token)
+        cached = revocation_cache.check_digest(digest)
+        if cached:
+            revoked.add(token)
+        elif cached is None:
+            unresolved[digest] = token
+
+    # Whatever the cache cannot answer is resolved with one set-based query
+    if unresolved:
+        try:
+            with timed_phase("blacklist_lookup"):
+                result = await db.execute(
+                    select(TokenBlacklist.token_digest).where(TokenBlacklist.token_digest.in_(list(unresolved))))
+            revoked.update(unresolved[digest] for digest in result.scalars().all())
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    # Tokens from before a user's last revoke-all; epochs come from the cache or one IN query
+    epoch_bound = {token: claims for token, (token_status, claims) in zip(payload.tokens, decoded)
+                   if token_status == "valid" and claims.gen is not None and token not in revoked}
+    if epoch_bound:
+        try:
+            epochs = await user_epochs.current_many(
+                {user_id for user_id in map(subject_id, epoch_bound.values()) if user_id is not None}, db)
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+        revoked.update(token for token, claims in epoch_bound.items() if epochs.get(subject_id(claims)) != claims.gen)
+
+    results = []
+    for token, (token_status, claims) in zip(payload.tokens, decoded):
+        if token_status == "valid" and token not in revoked:
+            results.append({"status": "valid", "sub": claims.sub, "exp": claims.exp})
+        else:
+            results.append({"status": "revoked" if token_status == "valid" else token_status})
+
+    elapsed = time.perf_counter() - started
+    introspection_stats.record(results, elapsed)
+    response.headers["Server-Timing"] = f"introspect;dur={elapsed * 1000:.3f}"
+    return {"results": results}
@@ -0,0 +1,43 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.base import get_async_db
+from d4_auth_svc.sessions import (
+    ExpiredRefreshTokenError,
+    RefreshTokenError,
+    RefreshTokenReuseError,
+    TokenPairResponse,
+    issue_token_pair,
+    rotate_refresh_token,
+)
+
+router = APIRouter()
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+@router.post("/refresh", response_model=TokenPairResponse)
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    # The only authenticated call that reads or writes the sessions table
+    try:
+        with timed_phase("session_refresh"):
+            auth_session, refresh_token = await rotate_refresh_token(db, payload.refresh_token)
+    except RefreshTokenReuseError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                            detail="Refresh token reuse detected; session revoked")
+    except ExpiredRefreshTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired")
+    except RefreshTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    return issue_token_pair(auth_session, refresh_token)
@@ -0,0 +1,41 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.models.base import get_async_db
+from d4_auth_svc.revocation_cache import revocation_cache
+from d4_auth_svc.token_epochs import user_epochs
+from d4_auth_svc.tokens import ExpiredTokenError, TokenError, token_signer
+
+router = APIRouter()
+
+
+@router.get("/verify")
+async def verify(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Extract Authorization header
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        raise HTTPException(status_code=400, detail="Missing or malformed Authorization header")
+
+    token = auth_header.split(" ")[1]
+
+    # Signature and expiry are checked in-process; no shared state is needed
+    try:
+        claims = token_signer.decode(token)
+    except ExpiredTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
+    except TokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    # Only authentic tokens reach the revocation check
+    try:
+        # Explicitly revoked, or issued before the user's last revoke-all
+        revoked = await revocation_cache.is_revoked(token, db) or not await user_epochs.is_current(claims, db)
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+    if revoked:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+
+    return {"active": True, "sub": claims.sub, "iat": claims.iat, "exp": claims.exp}
@@ -1,14 +1,18 @@
 import logging
-import secrets
-import bcrypt
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.future import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from d4_auth_svc.models.user import User
-from d4_auth_svc.models.base import get_db
+from d4_auth_svc.hashing import needs_rehash, password_hasher
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.user import User, email_matches
+from d4_auth_svc.models.base import REPLICA_READ, get_async_db
+from d4_auth_svc.session_writer import session_writer
+from d4_auth_svc.sessions import TokenPairResponse, issue_token_pair
+from d4_auth_svc.throttling import login_throttle
+from d4_auth_svc.token_epochs import user_epochs
 
 router = APIRouter()
 
@@ -16,12 +20,19 @@ class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
-@router.post("/login")
-async def login(login_req: LoginRequest, db: Session = Depends(get_db)):
+@router.post("/login", response_model=TokenPairResponse)
+async def login(login_req: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Throttle before any DB or bcrypt work is spent on the attempt
+    rejection = login_throttle.admit(login_req.email, request.client.host if request.client else None)
+    if rejection:
+        raise HTTPException(status_code=rejection.status_code, detail=rejection.detail,
+                            headers={"Retry-After": str(rejection.retry_after)})
+
     try:
-        # Query the user by email using SQLAlchemy 2.0 style
-        query = select(User).filter_by(email=login_req.email)
-        result = db.execute(query)
+        # Query the user by normalized email using SQLAlchemy 2.0 style; a read replica may answer
+        query = select(User).where(email_matches(login_req.email))
+        with timed_phase("user_lookup"):
+            result = await db.execute(query, bind_arguments=REPLICA_READ)
         user = result.scalars().first()
     except Exception as e:
         logging.error(e, exc_info=True)
@@ -31,7 +42,8 @@ async def login(login_req: LoginRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     try:
-        valid = bcrypt.checkpw(login_req.password.encode('utf-8'), user.hashed_password.encode('utf-8'))
+        # Verify on the hashing pool so bcrypt never blocks the event loop
+        valid = await password_hasher.verify_password(login_req.password, user.hashed_password)
     except Exception as e:
         logging.error(e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
@@ -39,5 +51,39 @@ async def login(login_req: LoginRequest, db: Session = Depends(get_db)):
     if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = secrets.token_hex(16)
-    return {"access_token": token}
+    # Read before any rollback below expires the loaded user
+    user_id, token_epoch = user.id, user.token_epoch
+
+    if db.info.get("replica_read"):
+        # A lagging replica can predate a revoke-all; the epoch the tokens carry and that seeds
+        # the cache must come from the primary
+        try:
+            result = await db.execute(select(User.token_epoch).where(User.id == user_id))
+            token_epoch = result.scalar_one()
+        except Exception as e:
+            logging.error(e, exc_info=True)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    # Bring the stored hash to the configured cost while the plaintext is at hand
+    if needs_rehash(user.hashed_password, password_hasher.rounds):
+        try:
+            user.hashed_password = await password_hasher.hash_password(login_req.password)
+            await db.commit()
+        except Exception as e:
+            # The login itself succeeded; the rehash is retried on the next one
+            logging.error(e, exc_info=True)
+            await db.rollback()
+
+    # Persist the session, batched with concurrent logins; access tokens minted from it skip the database
+    try:
+        # Hand the connection back first: the writer takes one from the same pool, and logins
+        # waiting on it while holding theirs could exhaust the pool
+        await db.close()
+        auth_session, refresh_token = await session_writer.create(user_id, token_epoch)
+        # The epoch was just read, so checks on the new token need no lookup
+        user_epochs.set(user_id, token_epoch)
+    except Exception as e:
+        logging.error(e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    return issue_token_pair(auth_session, refresh_token)
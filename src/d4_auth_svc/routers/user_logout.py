@@ -1,15 +1,23 @@
 import datetime
 import logging
 from fastapi import APIRouter, Depends, Request, HTTPException, status
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from d4_auth_svc.models.token_blacklist import TokenBlacklist
-from d4_auth_svc.models.base import get_db
+from d4_auth_svc.models.base import get_async_db
+from d4_auth_svc.revocation_cache import revocation_cache
+from d4_auth_svc.revocation_writer import revocation_writer
+from d4_auth_svc.tokens import TokenError, token_signer
 
 router = APIRouter()
 
-@router.post("/logout")
-def logout(request: Request, db: Session = Depends(get_db)):
+
+class LogoutResponse(BaseModel):
+    message: str
+
+
+@router.post("/logout", response_model=LogoutResponse)
+async def logout(request: Request, db: AsyncSession = Depends(get_async_db)):
     # Extract Authorization header
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -18,18 +26,24 @@ def logout(request: Request, db: Session = Depends(get_db)):
     token = auth_header.split(" ")[1]
     
     try:
-        # Check if token is already blacklisted
-        existing_token = db.get(TokenBlacklist, token)
-        if existing_token:
+        # Check if token is already blacklisted; a warm cache answers without the DB
+        if await revocation_cache.is_revoked(token, db):
+            raise HTTPException(status_code=401, detail="Token already invalidated")
+
+        # The entry only has to outlive the token itself (default TTL: 1 hour from now)
+        try:
+            claims = token_signer.decode(token)
+            expires_at = datetime.datetime.utcfromtimestamp(claims.exp)
+        except TokenError:
+            claims = None
+            expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        # Written together with other logouts arriving at the same time (one commit per batch)
+        session_id = claims.sid if claims is not None else None
+        if not await revocation_writer.revoke(token, expires_at, session_id):
+            # Revoked concurrently (or by another worker) since the check above
             raise HTTPException(status_code=401, detail="Token already invalidated")
 
-        # Compute expiration timestamp (default TTL: 1 hour from now)
-        expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
-        new_blacklist_entry = TokenBlacklist(token=token, expires_at=expires_at)
-        
-        db.add(new_blacklist_entry)
-        db.commit()
-        
+        revocation_cache.add(token, expires_at)
         return {"message": "Logout successful, token invalidated."}
     except HTTPException as he:
         raise he
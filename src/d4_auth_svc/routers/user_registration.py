@@ -1,15 +1,18 @@
 import logging
-import time
 
-import httpx
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr, validator
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from d4_auth_svc.config import EMAIL_SERVICE_URL, EMAIL_API_KEY
-from d4_auth_svc.models.base import get_db
-from d4_auth_svc.models.user import User
+from d4_auth_svc.breached_passwords import breached_passwords
+from d4_auth_svc.config import EMAIL_SERVICE_URL
+from d4_auth_svc.email_dispatch import email_dispatcher
+from d4_auth_svc.hashing import password_hasher
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.base import REPLICA_READ, get_async_db
+from d4_auth_svc.registration_writer import registration_writer
+from d4_auth_svc.models.user import User, email_matches
 
 router = APIRouter()
 
@@ -28,50 +31,40 @@ class UserRegistrationPayload(BaseModel):
             raise ValueError('Password must contain at least one lowercase letter')
         if not any(ch.isdigit() for ch in v):
             raise ValueError('Password must contain at least one number')
+        if breached_passwords.is_breached(v):
+            raise ValueError('Password has appeared in a data breach; choose a different one')
         return v
 
 
+class RegistrationResponse(BaseModel):
+    message: str
+
+
 def send_welcome_email(email: str, full_name: str) -> None:
     try:
-        # Build email payload
-        payload = {
-            "recipient": email,
-            "full_name": full_name,
-            "subject": "Welcome to Our Platform",
-            "message": f"Dear {full_name}, welcome to our platform!"
-        }
-        headers = {
-            "Authorization": f"Bearer {EMAIL_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
         # Ensure EMAIL_SERVICE_URL is set and uses HTTPS
         if not EMAIL_SERVICE_URL or not EMAIL_SERVICE_URL.startswith("https://"):
             logging.error("EMAIL_SERVICE_URL is not properly configured with HTTPS.")
             return
 
-        # Retry mechanism: try up to 3 times
-        for attempt in range(3):
-            try:
-                response = httpx.post(EMAIL_SERVICE_URL, json=payload, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    return
-                else:
-                    logging.error(f"Email service responded with status code {response.status_code} on attempt {attempt + 1} of 3")
-            except Exception as e:
-                logging.error(e, exc_info=True)
-            time.sleep(1)
-        logging.error(f"Failed to send welcome email to {email} after 3 attempts.")
+        # Queue the message; delivery and retries happen off the request path
+        email_dispatcher.enqueue({
+            "recipient": email,
+            "full_name": full_name,
+            "subject": "Welcome to Our Platform",
+            "message": f"Dear {full_name}, welcome to our platform!"
+        })
     except Exception as e:
         logging.error(e, exc_info=True)
 
 
-@router.post("/register")
-
-def register_user(payload: UserRegistrationPayload, db: Session = Depends(get_db)):
+@router.post("/register", response_model=RegistrationResponse)
+async def register_user(payload: UserRegistrationPayload, db: AsyncSession = Depends(get_async_db)):
     try:
-        # Check for existing user using SQLAlchemy 2.0 style query
-        result = db.execute(select(User).where(User.email == payload.email))
+        # Check for existing user using SQLAlchemy 2.0 style query; a read replica may answer.
+        # Only the id is read, so the email index answers it without touching the table
+        with timed_phase("user_lookup"):
+            result = await db.execute(select(User.id).where(email_matches(payload.email)), bind_arguments=REPLICA_READ)
         existing_user = result.scalars().first()
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
@@ -81,24 +74,24 @@ def register_user(payload: UserRegistrationPayload, db: Session = Depends(get_db
         logging.error(e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    # Hash the password using bcrypt
+    # Hash the password on the bcrypt worker pool
     try:
-        import bcrypt
-        hashed_password = bcrypt.hashpw(payload.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await password_hasher.hash_password(payload.password)
     except Exception as e:
         logging.error(e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    # Create and persist the new user
+    # Create and persist the new user, batched with concurrent registrations
     try:
-        new_user = User(email=payload.email, full_name=payload.full_name, hashed_password=hashed_password)
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        # Hand the connection back first: the writer takes one from the same pool
+        await db.close()
+        created = await registration_writer.register(payload.email, payload.full_name, hashed_password)
     except Exception as e:
         logging.error(e, exc_info=True)
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    if not created:
+        # Registered concurrently, or not yet visible on the replica that answered the check above
+        raise HTTPException(status_code=400, detail="Email already registered")
 
     # Trigger email integration
     send_welcome_email(payload.email, payload.full_name)
@@ -0,0 +1,147 @@
+"""Login sessions backed by rotating refresh tokens.
+
+Access tokens are short-lived and verified without touching the database. A
+session row is only read and written when its refresh token is exchanged, so
+database load follows the number of sessions rather than the number of
+authenticated requests.
+
+Refresh tokens look like ``<session id>.<secret>`` and only a SHA-256 of the
+current secret is stored. Every refresh swaps in a new secret with a
+compare-and-swap UPDATE; presenting the secret that was just rotated out
+means the token was copied, and the whole session is revoked. Any other
+wrong secret is only rejected: the session id is visible in access tokens,
+so a guess must not be able to end someone else's session. A session also
+ends when its user's token epoch moves on (see ``token_epochs``).
+"""
+import datetime
+import hashlib
+import hmac
+import secrets
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.config import ACCESS_TOKEN_TTL_SECONDS, REFRESH_TOKEN_TTL_SECONDS
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.user import User
+from d4_auth_svc.token_epochs import user_epochs
+from d4_auth_svc.tokens import token_signer
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token cannot be exchanged."""
+
+
+class InvalidRefreshTokenError(RefreshTokenError):
+    pass
+
+
+class ExpiredRefreshTokenError(RefreshTokenError):
+    pass
+
+
+class RefreshTokenReuseError(RefreshTokenError):
+    pass
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+def _new_secret() -> tuple[str, str]:
+    secret = secrets.token_urlsafe(32)
+    return secret, _hash_secret(secret)
+
+
+def new_session(user_id: int, token_epoch: int = 0, ttl_seconds: int = REFRESH_TOKEN_TTL_SECONDS,
+                now: Optional[datetime.datetime] = None) -> tuple[AuthSession, str]:
+    """Build a new, not yet persisted session; returns it with its refresh token."""
+    now = now or datetime.datetime.utcnow()
+    secret, secret_hash = _new_secret()
+    auth_session = AuthSession(
+        id=secrets.token_hex(16),
+        user_id=user_id,
+        refresh_token_hash=secret_hash,
+        generation=0,
+        token_epoch=token_epoch,
+        created_at=now,
+        expires_at=now + datetime.timedelta(seconds=ttl_seconds),
+    )
+    return auth_session, f"{auth_session.id}.{secret}"
+
+
+async def revoke_session(db: AsyncSession, session_id: str, now: Optional[datetime.datetime] = None) -> bool:
+    """Mark a session revoked (the caller commits); False if it was unknown or already revoked."""
+    result = await db.execute(
+        update(AuthSession)
+        .where(AuthSession.id == session_id, AuthSession.revoked_at.is_(None))
+        .values(revoked_at=now or datetime.datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str,
+                               now: Optional[datetime.datetime] = None) -> tuple[AuthSession, str]:
+    """Exchange a refresh token for its successor; commits on success and on detected reuse."""
+    now = now or datetime.datetime.utcnow()
+    session_id, sep, secret = refresh_token.partition(".")
+    if not sep or not session_id or not secret:
+        raise InvalidRefreshTokenError("Malformed refresh token")
+
+    auth_session = await db.get(AuthSession, session_id)
+    if auth_session is None or auth_session.revoked_at is not None:
+        raise InvalidRefreshTokenError("Unknown or revoked session")
+    if auth_session.expires_at <= now:
+        raise ExpiredRefreshTokenError("Session expired")
+    epoch = (await db.execute(select(User.token_epoch).where(User.id == auth_session.user_id))).scalar()
+    if epoch is None or epoch != auth_session.token_epoch:
+        raise InvalidRefreshTokenError("Session ended by a revoke-all")
+    user_epochs.set(auth_session.user_id, epoch)
+
+    presented_hash = _hash_secret(secret)
+    new_secret, new_hash = _new_secret()
+    swapped = False
+    if hmac.compare_digest(presented_hash, auth_session.refresh_token_hash):
+        # Only one of several concurrent refreshes with the same token can win
+        result = await db.execute(
+            update(AuthSession)
+            .where(AuthSession.id == session_id,
+                   AuthSession.refresh_token_hash == presented_hash,
+                   AuthSession.revoked_at.is_(None))
+            .values(refresh_token_hash=new_hash, previous_refresh_token_hash=presented_hash,
+                    generation=AuthSession.generation + 1, last_refreshed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        swapped = result.rowcount == 1
+    elif not (auth_session.previous_refresh_token_hash
+              and hmac.compare_digest(presented_hash, auth_session.previous_refresh_token_hash)):
+        # Never issued for this session (or rotated out generations ago)
+        raise InvalidRefreshTokenError("Unknown refresh token")
+
+    if not swapped:
+        await revoke_session(db, session_id, now)
+        await db.commit()
+        raise RefreshTokenReuseError("Refresh token was already used")
+
+    await db.commit()
+    return auth_session, f"{session_id}.{new_secret}"
+
+
+class TokenPairResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+
+
+def issue_token_pair(auth_session: AuthSession, refresh_token: str) -> dict:
+    """Response body for login and refresh, shaped as ``TokenPairResponse``."""
+    return {
+        "access_token": token_signer.issue(str(auth_session.user_id), ACCESS_TOKEN_TTL_SECONDS,
+                                           session_id=auth_session.id, epoch=auth_session.token_epoch),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL_SECONDS,
+    }
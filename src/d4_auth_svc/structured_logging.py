@@ -0,0 +1,207 @@
+"""Non-blocking, structured logging.
+
+Code keeps calling ``logging.error(e, exc_info=True)``; what changes is the
+handler behind the root logger. ``BoundedQueueHandler`` only stamps the
+record with the current request id and puts it on a bounded queue without
+waiting. A listener thread formats records as compact JSON lines, tracebacks
+included, and writes them to stderr. During an outage that makes every
+request log an error, the event loop pays a dict lookup and a queue put per
+record. When the queue is full the record is dropped and counted.
+
+Repeated warnings and errors from the same place (same logger, source line
+and exception type) are let through LOG_REPEAT_LIMIT times per
+LOG_REPEAT_WINDOW_SECONDS; the first one after the window reports how many
+were suppressed in between.
+
+``logging_config()`` is handed to uvicorn, so every worker process sets the
+pipeline up for itself and uvicorn's own loggers feed into it.
+"""
+import copy
+import datetime
+import json
+import logging
+import logging.config
+import queue
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from d4_auth_svc.config import LOG_LEVEL, LOG_QUEUE_SIZE, LOG_REPEAT_LIMIT, LOG_REPEAT_WINDOW_SECONDS
+
+REQUEST_ID_HEADER = "x-request-id"
+# Client-supplied ids are echoed into logs, so only plain tokens are accepted
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class LogPipelineStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.dropped = 0
+        self.suppressed = 0
+
+    def reset(self) -> None:
+        self.enqueued = self.dropped = self.suppressed = 0
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+        }
+
+
+log_stats = LogPipelineStats()
+
+
+class RepeatLimiter:
+    """Lets ``limit`` warnings/errors per call site and exception type through per window."""
+
+    def __init__(self, limit: int, window_seconds: float):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        # key -> [window start, records let through, records suppressed]; keys are bounded by the code's call sites
+        self._windows: dict[tuple, list] = {}
+
+    def allow(self, record: logging.LogRecord, now: Optional[float] = None) -> bool:
+        if self.limit <= 0 or record.levelno < logging.WARNING:
+            return True
+        now = now if now is not None else time.monotonic()
+        key = (record.name, record.levelno, record.pathname, record.lineno,
+               record.exc_info[0] if record.exc_info else None)
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.window_seconds:
+            if window is not None and window[2]:
+                record.suppressed = window[2]
+            self._windows[key] = [now, 1, 0]
+            return True
+        if window[1] < self.limit:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                                   .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full at shutdown; wait for the thread to make room
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    def __init__(self, queue_size: int = LOG_QUEUE_SIZE, repeat_limit: int = LOG_REPEAT_LIMIT,
+                 repeat_window_seconds: float = LOG_REPEAT_WINDOW_SECONDS, stream=None):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.limiter = RepeatLimiter(repeat_limit, repeat_window_seconds)
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+        self.listener = _Listener(self.queue, output)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the cheap part runs on the caller's thread; the listener formats tracebacks
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            log_stats.enqueued += 1
+        except queue.Full:
+            log_stats.dropped += 1
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.limiter.allow(record):
+            log_stats.suppressed += 1
+            return
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        # Flushes what is queued; runs when logging is reconfigured and at exit
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def logging_config(level: str = LOG_LEVEL) -> dict:
+    """dictConfig routing the root logger (and uvicorn's loggers) through the queue."""
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "handlers": {
+            "queue": {"()": "d4_auth_svc.structured_logging.BoundedQueueHandler"},
+        },
+        "root": {"level": level, "handlers": ["queue"]},
+        "loggers": {
+            name: {"level": level, "handlers": [], "propagate": True}
+            for name in ("uvicorn", "uvicorn.error", "uvicorn.access")
+        },
+    }
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    logging.config.dictConfig(logging_config(level))
+
+
+class RequestIdMiddleware:
+    """ASGI middleware giving every request an id, echoed in ``X-Request-ID`` and in its log lines.
+
+    A well-formed incoming ``X-Request-ID`` (e.g. from a load balancer) is kept.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = None
+        for name, header in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode("ascii"):
+                value = header.decode("latin-1")
+                break
+        if value is None or not REQUEST_ID_PATTERN.match(value):
+            value = uuid.uuid4().hex
+        encoded = value.encode("ascii")
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-request-id", encoded)]}
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
@@ -0,0 +1,160 @@
+"""Login throttling and admission control.
+
+Every login attempt costs a full bcrypt verification, so attempts are limited
+per email and per client IP before the user lookup, and new attempts are
+shed while the hashing pool is already backed up.
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from d4_auth_svc.config import (
+    LOGIN_THROTTLE_ENABLED,
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    LOGIN_RATE_LIMIT_PER_EMAIL,
+    LOGIN_RATE_LIMIT_PER_IP,
+    LOGIN_RATE_LIMIT_MAX_KEYS,
+    LOGIN_MAX_HASH_QUEUE_DEPTH,
+    SERVICE_WORKERS,
+)
+from d4_auth_svc.hashing import PasswordHasher, password_hasher
+from d4_auth_svc.models.user import normalize_email
+
+
+class SlidingWindowLimiter:
+    """Approximate sliding-window counter per key.
+
+    Each key keeps only the counts of the current and previous fixed window;
+    the previous one is weighted by how much of it still overlaps the sliding
+    window. Keys are kept in LRU order and capped at ``max_keys``, and buckets
+    idle for two windows are dropped.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _expire(self, now: float) -> None:
+        while self._buckets:
+            window_start = next(iter(self._buckets.values()))[0]
+            if now - window_start < 2 * self.window and len(self._buckets) <= self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    def hit(self, key: str, now: Optional[float] = None) -> float:
+        """Record an attempt; returns 0 if allowed, else seconds until it would be."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # [current window start, current count, previous count]
+            bucket = [now, 0, 0]
+            self._buckets[key] = bucket
+        else:
+            self._buckets.move_to_end(key)
+            windows_passed = int((now - bucket[0]) // self.window)
+            if windows_passed == 1:
+                bucket[:] = [bucket[0] + self.window, 0, bucket[1]]
+            elif windows_passed > 1:
+                bucket[:] = [bucket[0] + windows_passed * self.window, 0, 0]
+        self._expire(now)
+
+        window_start, current, previous = bucket
+        elapsed = now - window_start
+        estimate = previous * (1 - elapsed / self.window) + current
+        if estimate < self.limit:
+            bucket[1] += 1
+            return 0.0
+
+        if current >= self.limit:
+            # Wait for this window to close and enough of it to slide out
+            retry_after = (self.window - elapsed) + self.window * (1 - self.limit / current)
+        else:
+            retry_after = self.window * (1 - (self.limit - current) / previous) - elapsed
+        # The estimate has to drop strictly below the limit, so round past the boundary
+        return max(1.0, math.floor(retry_after) + 1.0)
+
+
+@dataclass
+class Rejection:
+    status_code: int
+    detail: str
+    retry_after: int
+
+
+def per_worker_limit(limit: int, workers: int) -> int:
+    """Share of a node-wide limit for one server process.
+
+    Buckets are kept per process, and connections are spread roughly evenly
+    across processes, so each one enforces its share of the budget.
+    """
+    return max(1, math.ceil(limit / max(1, workers)))
+
+
+class LoginThrottle:
+    def __init__(self, per_email: int, per_ip: int, window_seconds: float, max_keys: int,
+                 max_hash_queue_depth: int, hasher: PasswordHasher, enabled: bool = True):
+        self.enabled = enabled
+        self.per_email = per_email
+        self.per_ip = per_ip
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.max_hash_queue_depth = max_hash_queue_depth
+        self.hasher = hasher
+        self.reset()
+
+    def reset(self) -> None:
+        self.email_limiter = SlidingWindowLimiter(self.per_email, self.window_seconds, self.max_keys)
+        self.ip_limiter = SlidingWindowLimiter(self.per_ip, self.window_seconds, self.max_keys)
+        self.rejected_email = 0
+        self.rejected_ip = 0
+        self.rejected_overload = 0
+
+    def admit(self, email: str, client_ip: Optional[str]) -> Optional[Rejection]:
+        """Decide whether a login attempt may proceed to the user lookup and hash."""
+        if not self.enabled:
+            return None
+
+        # Shed load first so rejected attempts do not consume rate-limit budget
+        if 0 < self.max_hash_queue_depth <= self.hasher.queue_depth:
+            self.rejected_overload += 1
+            return Rejection(503, "Service overloaded, retry later", 1)
+
+        if client_ip:
+            retry_after = self.ip_limiter.hit(client_ip)
+            if retry_after:
+                self.rejected_ip += 1
+                return Rejection(429, "Too many login attempts", int(retry_after))
+
+        # One bucket per account, however the address is spelled
+        retry_after = self.email_limiter.hit(normalize_email(email))
+        if retry_after:
+            self.rejected_email += 1
+            return Rejection(429, "Too many login attempts", int(retry_after))
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "rejected_email": self.rejected_email,
+            "rejected_ip": self.rejected_ip,
+            "rejected_overload": self.rejected_overload,
+            "tracked_emails": len(self.email_limiter),
+            "tracked_ips": len(self.ip_limiter),
+        }
+
+
+login_throttle = LoginThrottle(
+    per_email=per_worker_limit(LOGIN_RATE_LIMIT_PER_EMAIL, SERVICE_WORKERS),
+    per_ip=per_worker_limit(LOGIN_RATE_LIMIT_PER_IP, SERVICE_WORKERS),
+    window_seconds=LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    max_keys=LOGIN_RATE_LIMIT_MAX_KEYS,
+    max_hash_queue_depth=LOGIN_MAX_HASH_QUEUE_DEPTH,
+    hasher=password_hasher,
+    enabled=LOGIN_THROTTLE_ENABLED,
+)
@@ -0,0 +1,104 @@
+"""Per-user token generations ("log out everywhere").
+
+Every user row carries a ``token_epoch`` that is embedded in issued access
+tokens as the ``gen`` claim and recorded on sessions. Revoking everything a
+user holds is then a single UPDATE that bumps the epoch; tokens and sessions
+from an earlier epoch stop validating. Verification compares against a small
+in-process map of user epochs, refreshed after ``ttl_seconds``, so a bump made
+by another process takes effect within that delay.
+"""
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from d4_auth_svc.config import TOKEN_EPOCH_CACHE_TTL_SECONDS, TOKEN_EPOCH_CACHE_MAX_ENTRIES
+from d4_auth_svc.metrics import timed_phase
+from d4_auth_svc.models.user import User
+from d4_auth_svc.tokens import TokenClaims
+
+
+class UserEpochCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.reset()
+
+    def reset(self) -> None:
+        # user id -> (epoch, fetched at), least recently used first
+        self._entries: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, now: Optional[float] = None) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None or (now or time.monotonic()) - entry[1] >= self.ttl_seconds:
+            return None
+        self._entries.move_to_end(user_id)
+        return entry[0]
+
+    def set(self, user_id: int, epoch: int, now: Optional[float] = None) -> None:
+        self._entries[user_id] = (epoch, now or time.monotonic())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    async def current_many(self, user_ids: Iterable[int], db: AsyncSession) -> dict[int, int]:
+        """Epochs of the given users; unknown users are left out."""
+        epochs, missing = {}, []
+        for user_id in set(user_ids):
+            epoch = self.get(user_id)
+            if epoch is None:
+                missing.append(user_id)
+            else:
+                epochs[user_id] = epoch
+        self.hits += len(epochs)
+        if missing:
+            self.misses += len(missing)
+            with timed_phase("user_epoch_lookup"):
+                result = await db.execute(select(User.id, User.token_epoch).where(User.id.in_(missing)))
+            for user_id, epoch in result:
+                self.set(user_id, epoch)
+                epochs[user_id] = epoch
+        return epochs
+
+    async def is_current(self, claims: TokenClaims, db: AsyncSession) -> bool:
+        if claims.gen is None:
+            # Issued before token epochs existed; such tokens simply run out
+            return True
+        user_id = subject_id(claims)
+        if user_id is None:
+            return False
+        epochs = await self.current_many([user_id], db)
+        return epochs.get(user_id) == claims.gen
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def subject_id(claims: TokenClaims) -> Optional[int]:
+    try:
+        return int(claims.sub)
+    except ValueError:
+        return None
+
+
+async def bump_token_epoch(db: AsyncSession, user_id: int) -> bool:
+    """Invalidate every token and session of a user with one UPDATE (the caller commits)."""
+    result = await db.execute(
+        update(User).where(User.id == user_id).values(token_epoch=User.token_epoch + 1)
+        .execution_options(synchronize_session=False)
+    )
+    user_epochs.invalidate(user_id)
+    return result.rowcount == 1
+
+
+user_epochs = UserEpochCache(TOKEN_EPOCH_CACHE_TTL_SECONDS, TOKEN_EPOCH_CACHE_MAX_ENTRIES)
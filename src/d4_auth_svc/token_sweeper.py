@@ -0,0 +1,167 @@
+"""Purges expired token_blacklist and sessions rows in small, rate-limited batches.
+
+Runs periodically inside the service and as a one-shot command
+(``d4_auth_svc_sweep_tokens``). Each batch is its own short transaction so
+the sweep never holds locks that live logouts have to wait on.
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from d4_auth_svc.config import (
+    TOKEN_SWEEP_BATCH_SIZE,
+    TOKEN_SWEEP_MAX_ROWS_PER_SECOND,
+    TOKEN_SWEEP_INTERVAL_SECONDS,
+)
+from d4_auth_svc.models import base
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.revocation_cache import revocation_cache
+
+
+@dataclass
+class SweepResult:
+    rows_purged: int
+    batches: int
+    seconds: float
+
+
+async def _purge_expired(
+    key: InstrumentedAttribute,
+    expires_at: InstrumentedAttribute,
+    session_factory: Optional[Callable[[], AsyncSession]],
+    batch_size: int,
+    max_rows_per_second: float,
+    now: Optional[datetime.datetime],
+) -> SweepResult:
+    session_factory = session_factory or base.AsyncSessionLocal
+    now = now or datetime.datetime.utcnow()
+    started = time.perf_counter()
+    purged = 0
+    batches = 0
+
+    while True:
+        async with session_factory() as session:
+            keys = (await session.execute(
+                select(key).where(expires_at <= now).limit(batch_size)
+            )).scalars().all()
+            if not keys:
+                break
+            await session.execute(delete(key.class_).where(key.in_(keys)))
+            await session.commit()
+
+        purged += len(keys)
+        batches += 1
+        if len(keys) < batch_size:
+            break
+        if max_rows_per_second > 0:
+            await asyncio.sleep(len(keys) / max_rows_per_second)
+
+    return SweepResult(rows_purged=purged, batches=batches, seconds=time.perf_counter() - started)
+
+
+async def purge_expired_tokens(
+    session_factory: Optional[Callable[[], AsyncSession]] = None,
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE,
+    max_rows_per_second: float = TOKEN_SWEEP_MAX_ROWS_PER_SECOND,
+    now: Optional[datetime.datetime] = None,
+) -> SweepResult:
+    return await _purge_expired(TokenBlacklist.token_digest, TokenBlacklist.expires_at,
+                                session_factory, batch_size, max_rows_per_second, now)
+
+
+async def purge_expired_sessions(
+    session_factory: Optional[Callable[[], AsyncSession]] = None,
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE,
+    max_rows_per_second: float = TOKEN_SWEEP_MAX_ROWS_PER_SECOND,
+    now: Optional[datetime.datetime] = None,
+) -> SweepResult:
+    return await _purge_expired(AuthSession.id, AuthSession.expires_at,
+                                session_factory, batch_size, max_rows_per_second, now)
+
+
+class TokenSweeper:
+    def __init__(self, interval_seconds: float, batch_size: int, max_rows_per_second: float):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_rows_per_second = max_rows_per_second
+        self._task: Optional[asyncio.Task] = None
+
+        self.sweeps = 0
+        self.rows_purged = 0
+        self.sessions_purged = 0
+        self.last_result: Optional[SweepResult] = None
+
+    async def sweep_once(self) -> SweepResult:
+        result = await purge_expired_tokens(batch_size=self.batch_size,
+                                            max_rows_per_second=self.max_rows_per_second)
+        revocation_cache.purge_expired()
+        sessions = await purge_expired_sessions(batch_size=self.batch_size,
+                                                max_rows_per_second=self.max_rows_per_second)
+        self.sweeps += 1
+        self.rows_purged += result.rows_purged
+        self.sessions_purged += sessions.rows_purged
+        self.last_result = result
+        logging.info(f"Token sweep purged {result.rows_purged} rows in {result.batches} batches, {result.seconds:.3f}s; "
+                     f"{sessions.rows_purged} expired sessions")
+        return result
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep_once()
+            except Exception as e:
+                logging.error(e, exc_info=True)
+
+    async def start(self) -> None:
+        if self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "sweeps": self.sweeps,
+            "rows_purged": self.rows_purged,
+            "sessions_purged": self.sessions_purged,
+            "last_rows_purged": self.last_result.rows_purged if self.last_result else 0,
+            "last_seconds": self.last_result.seconds if self.last_result else 0.0,
+        }
+
+
+token_sweeper = TokenSweeper(TOKEN_SWEEP_INTERVAL_SECONDS, TOKEN_SWEEP_BATCH_SIZE, TOKEN_SWEEP_MAX_ROWS_PER_SECOND)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired token_blacklist and sessions rows.")
+    parser.add_argument("--batch-size", type=int, default=TOKEN_SWEEP_BATCH_SIZE)
+    parser.add_argument("--max-rows-per-second", type=float, default=TOKEN_SWEEP_MAX_ROWS_PER_SECOND,
+                        help="0 disables rate limiting")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(purge_expired_tokens(batch_size=args.batch_size,
+                                              max_rows_per_second=args.max_rows_per_second))
+    logging.info(f"Purged {result.rows_purged} expired tokens in {result.batches} batches, {result.seconds:.3f}s")
+    result = asyncio.run(purge_expired_sessions(batch_size=args.batch_size,
+                                                max_rows_per_second=args.max_rows_per_second))
+    logging.info(f"Purged {result.rows_purged} expired sessions in {result.batches} batches, {result.seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Self-verifying HMAC-signed access tokens.
+
+Format: ``v1.<key id>.<base64url claims>.<base64url signature>``. The claims
+carry subject, issue and expiry times, a random token id and, for tokens
+minted from a login session, the session id and the user's token epoch, so
+any holder of the signing keys can validate a token without shared state.
+Several keys may be configured at once for rotation: new tokens are signed
+with the active key, and tokens signed with any other configured key keep
+validating until that key is removed.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from d4_auth_svc.config import TOKEN_SIGNING_KEYS, TOKEN_ACTIVE_KEY_ID
+
+TOKEN_VERSION = "v1"
+
+
+class TokenError(Exception):
+    """Raised when a token cannot be accepted."""
+
+
+class MalformedTokenError(TokenError):
+    pass
+
+
+class ExpiredTokenError(TokenError):
+    pass
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    sub: str
+    iat: int
+    exp: int
+    jti: str
+    sid: Optional[str] = None
+    gen: Optional[int] = None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def parse_signing_keys(value: Optional[str]) -> dict[str, bytes]:
+    """Parse ``kid1:secret1,kid2:secret2`` into a key-id mapping."""
+    keys = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError("TOKEN_SIGNING_KEYS entries must look like <key id>:<secret>")
+        if "." in kid:
+            raise ValueError("Token signing key ids must not contain '.'")
+        keys[kid] = secret.encode("utf-8")
+    return keys
+
+
+class TokenSigner:
+    def __init__(self, keys: dict[str, bytes], active_key_id: Optional[str] = None):
+        if not keys:
+            raise ValueError("At least one token signing key is required")
+        self.keys = dict(keys)
+        self.active_key_id = active_key_id or next(iter(self.keys))
+        if self.active_key_id not in self.keys:
+            raise ValueError(f"Active token signing key {self.active_key_id!r} is not configured")
+
+    def _sign(self, kid: str, signing_input: str) -> bytes:
+        return hmac.new(self.keys[kid], signing_input.encode("ascii"), hashlib.sha256).digest()
+
+    def issue(self, subject: str, ttl_seconds: int, now: Optional[int] = None,
+              session_id: Optional[str] = None, epoch: Optional[int] = None) -> str:
+        issued_at = int(now if now is not None else time.time())
+        # jti keeps tokens issued to the same subject in the same second distinct
+        claims = {"sub": subject, "iat": issued_at, "exp": issued_at + ttl_seconds,
+                  "jti": secrets.token_urlsafe(12)}
+        if session_id is not None:
+            claims["sid"] = session_id
+        if epoch is not None:
+            claims["gen"] = epoch
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        signing_input = f"{TOKEN_VERSION}.{self.active_key_id}.{payload}"
+        return f"{signing_input}.{_b64encode(self._sign(self.active_key_id, signing_input))}"
+
+    def decode(self, token: str, now: Optional[int] = None) -> TokenClaims:
+        """Validate signature and expiry; raises TokenError subclasses on failure."""
+        parts = token.split(".")
+        if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+            raise MalformedTokenError("Unrecognized token format")
+        _, kid, payload, signature = parts
+        if kid not in self.keys:
+            raise MalformedTokenError("Unknown signing key")
+        try:
+            expected = self._sign(kid, f"{TOKEN_VERSION}.{kid}.{payload}")
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise MalformedTokenError("Invalid token signature")
+            claims = TokenClaims(**json.loads(_b64decode(payload)))
+        except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+            raise MalformedTokenError("Invalid token") from e
+        if claims.exp <= int(now if now is not None else time.time()):
+            raise ExpiredTokenError("Token expired")
+        return claims
+
+
+def _signer_from_config() -> TokenSigner:
+    keys = parse_signing_keys(TOKEN_SIGNING_KEYS)
+    if not keys:
+        logging.warning("TOKEN_SIGNING_KEYS is not set; using an ephemeral key, tokens will not survive a restart")
+        keys = {"ephemeral": secrets.token_bytes(32)}
+    return TokenSigner(keys, TOKEN_ACTIVE_KEY_ID)
+
+
+token_signer = _signer_from_config()
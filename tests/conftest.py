@@ -39,4 +39,74 @@ def client(session_local):
     with TestClient(app) as c:
         yield c
     app.dependency_overrides[get_db] = get_db
-# DO NOT MODIFY SECTION END
\ No newline at end of file
+# DO NOT MODIFY SECTION END
+
+class _SharedConnection:
+    """Proxy for the in-memory sqlite connection that ignores close()."""
+
+    def __init__(self, connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def async_session_local(session_local, monkeypatch):
+    # The routers use the async session factory; point it at the same
+    # in-memory database that session_local/db_session operate on.
+    import aiosqlite
+    from sqlalchemy import NullPool
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from d4_auth_svc.models import base
+
+    fairy = session_local.kw["bind"].raw_connection()
+    connection = fairy.driver_connection
+    fairy.close()
+
+    def creator():
+        return aiosqlite.Connection(lambda: _SharedConnection(connection), iter_chunk_size=64)
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=NullPool, async_creator=creator)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr(base, "AsyncSessionLocal", factory)
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def reset_revocation_cache():
+    from d4_auth_svc.revocation_cache import revocation_cache
+
+    yield revocation_cache
+    revocation_cache.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_login_throttle():
+    from d4_auth_svc.throttling import login_throttle
+
+    yield login_throttle
+    login_throttle.reset()
+
+
+@pytest.fixture(autouse=True)
+def no_revocation_polling(monkeypatch):
+    # Tests drive revocation syncs explicitly rather than from a background task
+    from d4_auth_svc.revocation_sync import revocation_sync
+
+    monkeypatch.setattr(revocation_sync, "interval_seconds", 0)
+
+
+@pytest.fixture(autouse=True)
+def reset_user_epochs():
+    from d4_auth_svc.token_epochs import user_epochs
+
+    yield user_epochs
+    user_epochs.reset()
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import d4_auth_svc
+from d4_auth_svc.app import create_app, startup_timings, warm_db_pool
+from d4_auth_svc.config import Settings
+from d4_auth_svc.models import base
+
+
+def test_probes_after_startup(client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+    assert {"import_seconds", "warmup_seconds", "startup_seconds"} <= set(startup_timings)
+
+
+def test_not_ready_until_lifespan_has_run():
+    app = create_app(Settings(debug=False, warmup=False))
+    # Without the context manager the lifespan never runs
+    client = TestClient(app)
+    assert client.get("/healthz").status_code == 200
+    assert client.get("/readyz").status_code == 503
+
+    with TestClient(app) as started:
+        assert started.get("/readyz").status_code == 200
+    assert app.state.ready is False
+
+
+def test_import_does_not_create_engines():
+    code = (
+        "import sys, d4_auth_svc.app\n"
+        "from d4_auth_svc.models import base\n"
+        "print('engine' in vars(base), 'async_engine' in vars(base), 'httpx' in sys.modules)\n"
+    )
+    # A fresh interpreter, so nothing imported by the test suite leaks in
+    env = {**os.environ, "PYTHONPATH": str(Path(d4_auth_svc.__file__).parents[1])}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert result.stdout.split() == ["False", "False", "False"]
+
+
+def test_warm_db_pool_opens_connections(tmp_path, monkeypatch):
+    engine = base.create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'warm.db'}")
+    monkeypatch.setattr(base, "async_engine", engine)
+    monkeypatch.setattr(base, "AsyncSessionLocal", async_sessionmaker(bind=engine))
+
+    async def run():
+        await warm_db_pool(3)
+        status = base.pool_status(engine.sync_engine.pool)
+        await engine.dispose()
+        return status
+
+    status = asyncio.run(run())
+    assert status["checked_in"] == 3
+    assert status["checked_out"] == 0
@@ -0,0 +1,96 @@
+import hashlib
+
+import pytest
+
+from d4_auth_svc.breached_passwords import (
+    BreachedPasswordFileError,
+    BreachedPasswordIndex,
+    breached_passwords,
+    build_index,
+)
+
+BREACHED = ["Password1", "Summer2024", "Qwerty123", "Letmein99"]
+
+
+def sha1_hex(password: str) -> str:
+    return hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+
+
+@pytest.fixture
+def breach_file(tmp_path):
+    lines = [f"{sha1_hex(password)}:{i + 1}\n" for i, password in enumerate(reversed(BREACHED))]
+    lines += [sha1_hex(f"filler-{i}") + "\n" for i in range(500)]
+    lines += [sha1_hex("Password1").lower() + "\n", "not a digest\n"]
+    path = tmp_path / "breached.bin"
+    result = build_index(lines, str(path), chunk_size=64)
+    assert result.runs > 1
+    assert result.skipped == 1
+    assert result.entries == len(BREACHED) + 500
+    return path
+
+
+@pytest.fixture
+def breach_check(breach_file):
+    breached_passwords.reset(str(breach_file))
+    yield breached_passwords
+    breached_passwords.reset(None)
+
+
+def test_index_lookup(breach_file):
+    index = BreachedPasswordIndex(str(breach_file))
+    assert len(index) == len(BREACHED) + 500
+    assert all(index.contains(password) for password in BREACHED)
+    assert index.contains("filler-0") and index.contains("filler-499")
+    assert not index.contains("Correct-Horse-Battery-9")
+    assert not index.contains_digest(b"\x00" * 20)
+    assert not index.contains_digest(b"\xff" * 20)
+    index.close()
+
+
+def test_empty_and_corrupt_files(tmp_path):
+    empty = tmp_path / "empty.bin"
+    build_index([], str(empty))
+    assert not BreachedPasswordIndex(str(empty)).contains("Password1")
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(empty.read_bytes()[:8] + (5).to_bytes(8, "little") + b"\x00" * 20)
+    with pytest.raises(BreachedPasswordFileError):
+        BreachedPasswordIndex(str(truncated))
+
+
+def test_zero_byte_file_disables_the_check(tmp_path):
+    zero = tmp_path / "zero.bin"
+    zero.write_bytes(b"")
+    with pytest.raises(BreachedPasswordFileError):
+        BreachedPasswordIndex(str(zero))
+
+    breached_passwords.reset(str(zero))
+    try:
+        assert not breached_passwords.is_breached("Password1")
+        assert breached_passwords.stats()["enabled"] is False
+    finally:
+        breached_passwords.reset(None)
+
+
+def test_registration_rejects_breached_password(client, breach_check):
+    response = client.post("/auth/register", json={
+        "email": "breached@example.com", "full_name": "Breached User", "password": "Summer2024"
+    })
+    assert response.status_code == 422
+    assert "data breach" in response.text
+
+    response = client.post("/auth/register", json={
+        "email": "breached@example.com", "full_name": "Breached User", "password": "Unbreached2024"
+    })
+    assert response.status_code == 200
+    assert breach_check.stats()["lookups"] == 2
+    assert breach_check.stats()["hits"] == 1
+
+
+def test_missing_file_disables_the_check(tmp_path):
+    breached_passwords.reset(str(tmp_path / "missing.bin"))
+    try:
+        assert not breached_passwords.is_breached("Password1")
+        assert breached_passwords.stats()["enabled"] is False
+    finally:
+        breached_passwords.reset(None)
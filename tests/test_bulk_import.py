@@ -0,0 +1,138 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+import pytest
+from sqlalchemy import event
+
+from d4_auth_svc.bulk_import import UserImporter, read_records
+from d4_auth_svc.models.user import User
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    def hash_password(password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+    monkeypatch.setattr("d4_auth_svc.bulk_import.hash_password_sync", hash_password)
+
+
+def run_import(session_local, records, chunk_size=2):
+    report = io.StringIO()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = UserImporter(session_local, executor, chunk_size=chunk_size, error_report=report).run(records)
+    errors = [json.loads(line) for line in report.getvalue().splitlines()]
+    return result, errors
+
+
+def test_import_csv(session_local, db_session, fast_hashing):
+    db_session.add(User(email="existing@example.com", full_name="Existing", hashed_password="x"))
+    db_session.commit()
+
+    source = io.StringIO(
+        "email,full_name,password\n"
+        "a@example.com,User A,Password1\n"
+        "b@example.com,User B,Password1\n"
+        "existing@example.com,Existing,Password1\n"
+        "not-an-email,Bad Email,Password1\n"
+        "c@example.com,User C,weak\n"
+        "a@example.com,User A again,Password1\n"
+        "d@example.com,User D,Password1\n"
+    )
+    result, errors = run_import(session_local, read_records(source, "csv"))
+
+    assert (result.rows, result.imported, result.skipped, result.failed) == (7, 3, 2, 2)
+    errors.sort(key=lambda error: error["line"])
+    assert [(error["line"], error["email"]) for error in errors] == [
+        (4, "existing@example.com"),
+        (5, "not-an-email"),
+        (6, "c@example.com"),
+        (7, "a@example.com"),
+    ]
+    assert "Password must be at least 8 characters long" in errors[2]["error"]
+
+    user = db_session.query(User).filter(User.email == "d@example.com").one()
+    assert user.full_name == "User D"
+    assert bcrypt.checkpw(b"Password1", user.hashed_password.encode('utf-8'))
+    assert db_session.query(User).count() == 4
+
+
+def test_import_jsonl_reports_undecodable_lines(session_local, db_session, fast_hashing):
+    source = io.StringIO(
+        json.dumps({"email": "a@example.com", "full_name": "User A", "password": "Password1"}) + "\n"
+        "{not json\n"
+        "\n"
+        "[1, 2]\n"
+    )
+    result, errors = run_import(session_local, read_records(source, "jsonl"))
+
+    assert (result.rows, result.imported, result.failed) == (3, 1, 2)
+    assert [error["line"] for error in errors] == [2, 4]
+
+
+def test_each_chunk_is_one_lookup_and_one_insert(session_local, fast_hashing):
+    records = [(n, {"email": f"user{n}@example.com", "full_name": f"User {n}", "password": "Password1"})
+               for n in range(10)]
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement.split()[0], executemany))
+
+    engine = session_local.kw["bind"]
+    event.listen(engine, "before_cursor_execute", record_statement)
+    try:
+        result, errors = run_import(session_local, records, chunk_size=5)
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+
+    assert result.imported == 10
+    assert errors == []
+    assert statements == [("SELECT", False), ("INSERT", True)] * 2
+
+
+def test_import_skips_emails_differing_only_in_case(session_local, db_session, fast_hashing):
+    db_session.add(User(email="Existing@Example.com", full_name="Existing", hashed_password="x"))
+    db_session.commit()
+
+    source = io.StringIO(
+        "email,full_name,password\n"
+        "EXISTING@example.com,Existing,Password1\n"
+        "New@Example.com,New,Password1\n"
+        "new@example.com,New again,Password1\n"
+    )
+    result, errors = run_import(session_local, read_records(source, "csv"), chunk_size=10)
+
+    assert (result.rows, result.imported, result.skipped, result.failed) == (3, 1, 2, 0)
+    assert sorted((error["line"], error["email"]) for error in errors) == [
+        (2, "EXISTING@example.com"),
+        (4, "new@example.com"),
+    ]
+    user = db_session.query(User).filter(User.email_normalized == "new@example.com").one()
+    assert user.email == "New@example.com"
+
+
+def test_import_reports_emails_registered_during_the_chunk(session_local, db_session, fast_hashing):
+    class RegisteringExecutor(ThreadPoolExecutor):
+        # Another process registers one of the emails after the existence check
+        def map(self, *args, **kwargs):
+            with session_local() as session:
+                session.add(User(email="Racer@example.com", full_name="Racer", hashed_password="x"))
+                session.commit()
+            return super().map(*args, **kwargs)
+
+    source = io.StringIO(
+        "email,full_name,password\n"
+        "a@example.com,User A,Password1\n"
+        "racer@example.com,Racer,Password1\n"
+        "b@example.com,User B,Password1\n"
+    )
+    report = io.StringIO()
+    with RegisteringExecutor(max_workers=2) as executor:
+        result = UserImporter(session_local, executor, chunk_size=10, error_report=report).run(
+            read_records(source, "csv"))
+
+    assert (result.rows, result.imported, result.skipped, result.failed) == (3, 2, 1, 0)
+    errors = [json.loads(line) for line in report.getvalue().splitlines()]
+    assert errors == [{"line": 3, "email": "racer@example.com", "error": "Email already registered"}]
+    assert db_session.query(User).count() == 3
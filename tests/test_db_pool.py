@@ -0,0 +1,76 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from d4_auth_svc.models import base
+from d4_auth_svc.models.base import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    create_async_db_engine,
+    create_db_engine,
+    get_db,
+    pool_status,
+    to_async_url,
+)
+
+
+def test_get_db_reuses_process_session_factory(monkeypatch):
+    created = []
+
+    def factory():
+        session = Session()
+        created.append(session)
+        return session
+
+    monkeypatch.setattr(base, "SessionLocal", factory)
+    generator = get_db()
+    session = next(generator)
+    assert created == [session]
+    generator.close()
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+    assert to_async_url("postgresql://u:p@db/auth") == "postgresql+asyncpg://u:p@db/auth"
+    assert to_async_url("sqlite+aiosqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+
+
+def test_file_sqlite_engine_pool_and_pragmas(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    try:
+        assert isinstance(engine.pool, TimedQueuePool)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            # NORMAL == 1
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            status = pool_status(engine.pool)
+            assert status["checked_out"] == 1
+
+        status = pool_status(engine.pool)
+        assert status["checked_out"] == 0
+        assert status["checked_in"] == 1
+        assert status["checkouts"] >= 1
+        assert status["max_checkout_wait_seconds"] >= 0
+    finally:
+        engine.dispose()
+
+
+def test_async_file_sqlite_engine_pool(tmp_path):
+    engine = create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+
+    async def run():
+        async with engine.connect() as conn:
+            mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+        await engine.dispose()
+        return mode
+
+    assert isinstance(engine.sync_engine.pool, TimedAsyncAdaptedQueuePool)
+    assert asyncio.run(run()) == "wal"
+
+
+def test_memory_sqlite_keeps_default_pool():
+    engine = create_db_engine("sqlite:///:memory:")
+    status = pool_status(engine.pool)
+    assert not isinstance(engine.pool, TimedQueuePool)
+    assert "checkouts" not in status
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from d4_auth_svc.email_dispatch import EmailDispatcher
+from d4_auth_svc.routers import user_registration
+
+
+class StubEmailService:
+    """Local HTTP server standing in for the email provider."""
+
+    def __init__(self, failures: int = 0, failure_status: int = 503):
+        self.requests = []
+        self.failures = failures
+        self.failure_status = failure_status
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append((self.path, self.headers.get("Authorization"), body))
+                status = 200
+                if stub.failures > 0:
+                    stub.failures -= 1
+                    status = stub.failure_status
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def message(n: int) -> dict:
+    return {"recipient": f"user{n}@example.com", "full_name": f"User {n}",
+            "subject": "Welcome to Our Platform", "message": "Welcome!"}
+
+
+def test_messages_are_delivered_and_drained_on_stop():
+    with StubEmailService() as stub:
+        dispatcher = EmailDispatcher(f"{stub.url}/send", api_key="secretkey", max_concurrency=2)
+
+        async def run():
+            await dispatcher.start()
+            for n in range(5):
+                assert dispatcher.enqueue(message(n))
+            await dispatcher.stop(timeout=5)
+
+        asyncio.run(run())
+
+    assert dispatcher.stats()["sent"] == 5
+    assert len(stub.requests) == 5
+    assert {body["recipient"] for _, _, body in stub.requests} == {f"user{n}@example.com" for n in range(5)}
+    assert all(auth == "Bearer secretkey" for _, auth, _ in stub.requests)
+
+
+def test_failed_delivery_is_retried_with_backoff():
+    with StubEmailService(failures=2) as stub:
+        dispatcher = EmailDispatcher(f"{stub.url}/send", max_attempts=3,
+                                     retry_base_delay=0.01, retry_max_delay=0.05)
+
+        async def run():
+            dispatcher.enqueue(message(1))
+            await dispatcher.stop(timeout=5)
+
+        asyncio.run(run())
+
+    stats = dispatcher.stats()
+    assert stats["sent"] == 1
+    assert stats["retries"] == 2
+    assert len(stub.requests) == 3
+
+
+def test_client_errors_are_not_retried():
+    with StubEmailService(failures=5, failure_status=400) as stub:
+        dispatcher = EmailDispatcher(f"{stub.url}/send", max_attempts=3, retry_base_delay=0.01)
+
+        async def run():
+            dispatcher.enqueue(message(1))
+            await dispatcher.stop(timeout=5)
+
+        asyncio.run(run())
+
+    assert dispatcher.stats()["failed"] == 1
+    assert len(stub.requests) == 1
+
+
+def test_queued_messages_are_batched():
+    with StubEmailService() as stub:
+        dispatcher = EmailDispatcher(f"{stub.url}/send", batch_url=f"{stub.url}/batch",
+                                     max_concurrency=1, batch_size=10)
+
+        async def run():
+            # Enqueue before the worker gets a chance to run so the batch fills up
+            for n in range(10):
+                dispatcher.enqueue(message(n))
+            await dispatcher.stop(timeout=5)
+
+        asyncio.run(run())
+
+    assert dispatcher.stats()["sent"] == 10
+    assert len(stub.requests) == 1
+    path, _, body = stub.requests[0]
+    assert path == "/batch"
+    assert len(body["messages"]) == 10
+
+
+def test_full_queue_drops_messages():
+    dispatcher = EmailDispatcher("https://email.invalid/send", queue_size=1)
+
+    async def run():
+        dispatcher._start()
+        for worker in dispatcher._workers:
+            worker.cancel()
+        results = [dispatcher.enqueue(message(n)) for n in range(2)]
+        await asyncio.gather(*dispatcher._workers, return_exceptions=True)
+        await dispatcher._client.aclose()
+        return results
+
+    assert asyncio.run(run()) == [True, False]
+    assert dispatcher.stats()["dropped"] == 1
+
+
+@pytest.mark.parametrize("url", [None, "http://email.example.com/send"])
+def test_send_welcome_email_requires_https(monkeypatch, url):
+    queued = []
+    monkeypatch.setattr(user_registration, "EMAIL_SERVICE_URL", url)
+    monkeypatch.setattr(user_registration.email_dispatcher, "enqueue", queued.append)
+
+    user_registration.send_welcome_email("user@example.com", "User")
+    assert queued == []
+
+
+def test_send_welcome_email_enqueues(monkeypatch):
+    queued = []
+    monkeypatch.setattr(user_registration, "EMAIL_SERVICE_URL", "https://email.example.com/send")
+    monkeypatch.setattr(user_registration.email_dispatcher, "enqueue", queued.append)
+
+    user_registration.send_welcome_email("user@example.com", "User")
+    assert queued[0]["recipient"] == "user@example.com"
+    assert queued[0]["full_name"] == "User"
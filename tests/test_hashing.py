@@ -0,0 +1,124 @@
+import asyncio
+
+import bcrypt
+import pytest
+
+from d4_auth_svc.hashing import PasswordHasher, bcrypt_cost, calibrate, needs_rehash, password_hasher
+from d4_auth_svc.models.user import User
+
+
+def fast_hash(password: str, rounds: int = 4) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def test_hash_and_verify_roundtrip():
+    hasher = PasswordHasher(max_workers=2)
+    try:
+        hashed = asyncio.run(hasher.hash_password("Password1"))
+        assert hashed != "Password1"
+        assert asyncio.run(hasher.verify_password("Password1", hashed))
+        assert not asyncio.run(hasher.verify_password("wrongpassword", hashed))
+    finally:
+        hasher.shutdown()
+
+    stats = hasher.stats()
+    assert stats["submitted"] == 3
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_queue_wait_is_accounted_with_single_worker():
+    hasher = PasswordHasher(max_workers=1)
+    hashed = fast_hash("Password1")
+
+    async def run_concurrently():
+        tasks = [asyncio.create_task(hasher.verify_password("Password1", hashed)) for _ in range(4)]
+        # Let every task reach the executor before inspecting the queue
+        await asyncio.sleep(0)
+        depth = hasher.queue_depth
+        results = await asyncio.gather(*tasks)
+        return depth, results
+
+    try:
+        depth, results = asyncio.run(run_concurrently())
+    finally:
+        hasher.shutdown()
+
+    assert all(results)
+    assert depth == 3
+    stats = hasher.stats()
+    assert stats["completed"] == 4
+    assert stats["max_wait_seconds"] > 0
+
+
+def test_process_pool_executor():
+    hasher = PasswordHasher(max_workers=1, kind="process")
+    try:
+        assert asyncio.run(hasher.verify_password("Password1", fast_hash("Password1")))
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["kind"] == "process"
+
+
+def test_invalid_executor_configuration():
+    with pytest.raises(ValueError):
+        PasswordHasher(max_workers=1, kind="fiber")
+    with pytest.raises(ValueError):
+        PasswordHasher(max_workers=0)
+
+
+def test_configured_cost_is_used_for_new_hashes():
+    hasher = PasswordHasher(max_workers=1, rounds=5)
+    try:
+        hashed = asyncio.run(hasher.hash_password("Password1"))
+    finally:
+        hasher.shutdown()
+    assert bcrypt_cost(hashed) == 5
+
+
+def test_needs_rehash():
+    hashed = fast_hash("Password1", rounds=4)
+    assert bcrypt_cost(hashed) == 4
+    assert not needs_rehash(hashed, 4)
+    assert needs_rehash(hashed, 5)
+    assert bcrypt_cost("not-a-bcrypt-hash") is None
+    assert needs_rehash("not-a-bcrypt-hash", 4)
+
+
+def test_calibrate_recommends_cost_within_budget():
+    measurements, recommended = calibrate(target_seconds=10.0, max_rounds=6, samples=1)
+    assert [rounds for rounds, _ in measurements] == [4, 5, 6]
+    assert recommended == 6
+
+    measurements, recommended = calibrate(target_seconds=0.0, max_rounds=6, samples=1)
+    assert len(measurements) == 1
+    assert recommended == 4
+
+
+def test_login_rehashes_when_cost_differs(client, db_session, monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    user = User(email="rehash@example.com", full_name="Rehash", hashed_password=fast_hash("Password1", rounds=5))
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"email": "rehash@example.com", "password": "Password1"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert bcrypt_cost(user.hashed_password) == 4
+    assert bcrypt.checkpw(b"Password1", user.hashed_password.encode('utf-8'))
+
+
+def test_login_keeps_hash_at_target_cost(client, db_session, monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    original = fast_hash("Password1", rounds=4)
+    user = User(email="current@example.com", full_name="Current", hashed_password=original)
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"email": "current@example.com", "password": "Password1"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.hashed_password == original
@@ -0,0 +1,77 @@
+import threading
+
+import bcrypt
+
+from d4_auth_svc.metrics import Counter, Histogram, Registry
+from d4_auth_svc.models.user import User
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, ("/a",))
+    cumulative, total = histogram.values()[("/a",)]
+    # Upper bounds are inclusive; the last slot is +Inf
+    assert cumulative == [2, 3, 4]
+    assert total == 2.65
+
+
+def test_shards_from_several_threads_are_merged():
+    counter = Counter("hits_total", "Hits.", ("route",))
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(1.0,))
+
+    def record():
+        for _ in range(1000):
+            counter.inc(("/a",))
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values() == {("/a",): 4000}
+    assert histogram.values()[()][0] == [4000, 4000]
+    assert len(counter._shards) == 4
+
+
+def test_render_text_format():
+    registry = Registry(prefix="test")
+    registry.counter("requests_total", "Requests.", ("route",)).inc(("/a",))
+    registry.histogram("seconds", "Latency.", buckets=(1.0,)).observe(0.25)
+    registry.register_stats("pool", lambda: {"size": 5, "warm": True, "kind": "thread"}, label=("engine", "sync"))
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{route="/a"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 1' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 1' in lines
+    assert "test_seconds_sum 0.25" in lines
+    assert "test_seconds_count 1" in lines
+    assert 'test_pool_size{engine="sync"} 5' in lines
+    assert 'test_pool_warm{engine="sync"} 1' in lines
+    # Non-numeric stats are skipped
+    assert not any(line.startswith("test_pool_kind") for line in lines)
+
+
+def test_metrics_endpoint_reports_routes_and_phases(client, db_session):
+    hashed = bcrypt.hashpw(b"testpassword", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    db_session.add(User(email="metrics@example.com", full_name="Metrics User", hashed_password=hashed))
+    db_session.commit()
+
+    assert client.post("/auth/login", json={"email": "metrics@example.com", "password": "testpassword"}).status_code == 200
+    assert client.get("/no/such/path").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    # Routes are labelled by their template, not the raw path
+    assert 'd4_auth_http_requests_total{method="POST",route="/auth/login",status="200"}' in body
+    assert 'd4_auth_http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'd4_auth_http_request_duration_seconds_count{method="POST",route="/auth/login"}' in body
+    assert 'd4_auth_phase_duration_seconds_count{phase="user_lookup"}' in body
+    assert 'd4_auth_phase_duration_seconds_count{phase="bcrypt_verify"}' in body
+    assert "d4_auth_password_hash_completed" in body
+    assert "d4_auth_revocation_cache_warm 1" in body
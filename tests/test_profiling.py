@@ -0,0 +1,69 @@
+import pstats
+
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+
+from d4_auth_svc.app import create_app
+from d4_auth_svc.config import Settings
+from d4_auth_svc.models.user import User
+from d4_auth_svc.profiling import ProfileStore, ProfilingMiddleware, request_profiler
+
+ADMIN = {"X-Profile-Token": "profiling-admin-token"}
+
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_profiler, "store", ProfileStore(str(tmp_path / "profiles"), 2))
+    monkeypatch.setattr(request_profiler, "admin_token", ADMIN["X-Profile-Token"])
+    monkeypatch.setattr(request_profiler, "sample_rate", 0.0)
+    with TestClient(create_app(Settings(debug=False, warmup=False, profiling=True))) as client:
+        yield client
+
+
+def test_admin_header_profiles_the_request(profiled_client, db_session, tmp_path):
+    hashed = bcrypt.hashpw(b"testpassword", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    db_session.add(User(email="profiled@example.com", full_name="Profiled User", hashed_password=hashed))
+    db_session.commit()
+
+    response = profiled_client.post("/auth/login", headers=ADMIN,
+                                    json={"email": "profiled@example.com", "password": "testpassword"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    profiles = profiled_client.get("/debug/profiles", headers=ADMIN).json()["profiles"]
+    assert [p["id"] for p in profiles] == [profile_id]
+    assert profiles[0]["route"] == "/auth/login"
+    assert profiles[0]["status"] == 200
+    assert {"user_lookup", "bcrypt_verify", "session_insert"} <= set(profiles[0]["phases"])
+
+    download = profiled_client.get(f"/debug/profiles/{profile_id}", headers=ADMIN)
+    assert download.status_code == 200
+    dump = tmp_path / "login.prof"
+    dump.write_bytes(download.content)
+    assert pstats.Stats(str(dump)).total_calls > 0
+
+
+def test_unprofiled_requests_and_access_control(profiled_client):
+    assert "X-Profile-Id" not in profiled_client.get("/healthz").headers
+    # A wrong token neither profiles the request nor opens the listing
+    assert "X-Profile-Id" not in profiled_client.get("/healthz", headers={"X-Profile-Token": "nope"}).headers
+    assert profiled_client.get("/debug/profiles").status_code == 403
+    assert profiled_client.get("/debug/profiles", headers={"X-Profile-Token": "nope"}).status_code == 403
+    assert profiled_client.get("/debug/profiles/0000000000000000-00000000", headers=ADMIN).status_code == 404
+    assert profiled_client.get("/debug/profiles/..%2Fsecrets", headers=ADMIN).status_code == 404
+
+
+def test_sampled_profiles_are_kept_as_a_bounded_ring(profiled_client, monkeypatch):
+    monkeypatch.setattr(request_profiler, "sample_rate", 1.0)
+    ids = [profiled_client.get("/healthz").headers["X-Profile-Id"] for _ in range(4)]
+    profiles = profiled_client.get("/debug/profiles", headers=ADMIN).json()["profiles"]
+    # Newest first; the two oldest were deleted
+    assert [p["id"] for p in profiles] == ids[:1:-1]
+    assert request_profiler.store.path(ids[0]) is None
+
+
+def test_disabled_by_default():
+    app = create_app(Settings(debug=False, warmup=False, profiling=False))
+    assert all(middleware.cls is not ProfilingMiddleware for middleware in app.user_middleware)
+    assert TestClient(app).get("/debug/profiles", headers=ADMIN).status_code == 404
@@ -0,0 +1,132 @@
+import asyncio
+
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from d4_auth_svc.app import create_app
+from d4_auth_svc.config import Settings
+from d4_auth_svc.models import base
+from d4_auth_svc.models.base import REPLICA_READ, ReplicaSet, RoutingSession
+from d4_auth_svc.models.user import User
+from d4_auth_svc.token_epochs import user_epochs
+from d4_auth_svc.tokens import token_signer
+
+
+def make_database(path, email: str) -> str:
+    url = f"sqlite:///{path}"
+    engine = base.create_db_engine(url)
+    base.Base.metadata.create_all(engine)
+    session = base.sessionmaker(bind=engine)()
+    session.add(User(email=email, full_name="Marker", hashed_password="x"))
+    session.commit()
+    session.close()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """A primary and two replicas; each holds one user naming the database it lives in."""
+    primary = make_database(tmp_path / "primary.db", "primary@example.com")
+    replica_urls = [make_database(tmp_path / f"replica{i}.db", f"replica{i}@example.com") for i in (1, 2)]
+    engine = base.create_async_db_engine(base.to_async_url(primary))
+    factory = async_sessionmaker(bind=engine, sync_session_class=RoutingSession, expire_on_commit=False)
+    replicas = ReplicaSet(replica_urls, health_interval_seconds=0)
+    monkeypatch.setattr(base, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(base, "replicas", replicas)
+    yield factory, replicas
+
+    async def dispose():
+        await engine.dispose()
+        for replica in replicas.engines:
+            await replica.dispose()
+
+    asyncio.run(dispose())
+
+
+async def answered_by(session, replica: bool = True) -> str:
+    result = await session.execute(select(User.email).order_by(User.id).limit(1),
+                                   bind_arguments=REPLICA_READ if replica else None)
+    return result.scalar_one().split("@")[0]
+
+
+def test_marked_reads_go_round_robin_to_replicas(databases):
+    factory, replicas = databases
+
+    async def run():
+        async with factory() as session:
+            return [await answered_by(session) for _ in range(4)] + [await answered_by(session, replica=False)]
+
+    assert asyncio.run(run()) == ["replica1", "replica2", "replica1", "replica2", "primary"]
+    assert replicas.stats()["replica0_reads"] == 2
+
+
+def test_reads_after_a_write_stay_on_the_primary(databases):
+    factory, _ = databases
+
+    async def run():
+        async with factory() as session:
+            before = await answered_by(session)
+            session.add(User(email="new@example.com", full_name="New", hashed_password="x"))
+            await session.commit()
+            after = await answered_by(session)
+            found = await session.execute(select(User).filter_by(email="new@example.com"), bind_arguments=REPLICA_READ)
+        return before, after, found.scalars().first() is not None
+
+    assert asyncio.run(run()) == ("replica1", "primary", True)
+
+
+def test_unhealthy_replicas_fall_back_to_the_primary(databases, tmp_path):
+    factory, replicas = databases
+    # Replace replica 1 by one that cannot be opened
+    replicas.engines[0] = base.create_async_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    async def run():
+        await replicas.check_health()
+        async with factory() as session:
+            healthy_one = [await answered_by(session) for _ in range(2)]
+        replicas.set_healthy(1, False)
+        async with factory() as session:
+            none_left = await answered_by(session)
+        await replicas.check_health()
+        return healthy_one, none_left
+
+    assert asyncio.run(run()) == (["replica2", "replica2"], "primary")
+    assert replicas.healthy == [False, True]
+    assert replicas.stats()["primary_fallbacks"] == 1
+
+
+def test_registration_duplicate_check_reads_from_replica(databases):
+    with TestClient(create_app(Settings(debug=False, warmup=False))) as client:
+        # Only the replicas know this address; the check must have been answered there
+        response = client.post("/auth/register", json={
+            "email": "replica1@example.com", "full_name": "Someone", "password": "Password1"
+        })
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email already registered"
+        # The primary's unique constraint still catches what a replica has not seen yet
+        response = client.post("/auth/register", json={
+            "email": "primary@example.com", "full_name": "Someone", "password": "Password1"
+        })
+        assert response.status_code == 400
+
+
+def test_login_takes_the_token_epoch_from_the_primary(databases, tmp_path):
+    hashed = bcrypt.hashpw(b"Password1", bcrypt.gensalt(rounds=4)).decode("utf-8")
+    # The primary has seen a revoke-all that the replicas have not caught up with yet
+    for name, epoch in (("primary", 1), ("replica1", 0), ("replica2", 0)):
+        engine = base.create_db_engine(f"sqlite:///{tmp_path / f'{name}.db'}")
+        with base.sessionmaker(bind=engine)() as session:
+            session.add(User(id=10, email="lagging@example.com", full_name="Lagging", hashed_password=hashed,
+                             token_epoch=epoch))
+            session.commit()
+        engine.dispose()
+
+    with TestClient(create_app(Settings(debug=False, warmup=False))) as client:
+        response = client.post("/auth/login", json={"email": "lagging@example.com", "password": "Password1"})
+    assert response.status_code == 200
+    assert token_signer.decode(response.json()["access_token"]).gen == 1
+    assert user_epochs.get(10) == 1
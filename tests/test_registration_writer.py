@@ -0,0 +1,62 @@
+import asyncio
+
+from sqlalchemy import event
+
+from d4_auth_svc.models.user import User
+from d4_auth_svc.registration_writer import RegistrationWriter
+
+
+def test_concurrent_registrations_share_commits(db_session, async_session_local):
+    writer = RegistrationWriter(window_seconds=0.05, max_batch=25)
+    commits = []
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "commit", count_commit)
+
+    async def run():
+        return await asyncio.gather(*(writer.register(f"user{i}@example.com", "User", "x") for i in range(60)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        event.remove(engine, "commit", count_commit)
+    assert results == [True] * 60
+    # Two full batches flushed by size, the remainder by the window
+    assert writer.stats()["batches"] == 3
+    assert len(commits) == 3
+    assert db_session.query(User).count() == 60
+
+
+def test_taken_and_repeated_emails(db_session):
+    # Registered by another worker after the route's lookup
+    db_session.add(User(email="taken@example.com", full_name="Taken", hashed_password="x"))
+    db_session.commit()
+    writer = RegistrationWriter(window_seconds=0.01, max_batch=100)
+
+    async def run():
+        return await asyncio.gather(writer.register("new@example.com", "First", "x"),
+                                    writer.register(" NEW@example.com", "Second", "x"),
+                                    writer.register("Taken@example.com", "Third", "x"))
+
+    assert asyncio.run(run()) == [True, False, False]
+    assert writer.stats()["conflicts"] == 2
+    assert db_session.query(User).filter_by(email_normalized="new@example.com").one().full_name == "First"
+    assert db_session.query(User).count() == 2
+
+
+def test_dialects_without_returning_check_first(db_session, async_session_local, monkeypatch):
+    db_session.add(User(email="old@example.com", full_name="Old", hashed_password="x"))
+    db_session.commit()
+    dialect = async_session_local.kw["bind"].dialect
+    monkeypatch.setattr(dialect, "insert_executemany_returning", False)
+    writer = RegistrationWriter(window_seconds=0.01, max_batch=100)
+
+    async def run():
+        return await asyncio.gather(writer.register("old@example.com", "Old", "x"),
+                                    writer.register("new@example.com", "New", "x"))
+
+    assert asyncio.run(run()) == [False, True]
+    assert db_session.query(User).count() == 2
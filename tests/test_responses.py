@@ -0,0 +1,82 @@
+import importlib
+
+import bcrypt
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from d4_auth_svc.app import create_app, json_response_class
+from d4_auth_svc.config import Settings
+from d4_auth_svc.models.user import User
+
+
+def test_json_response_class_selection(monkeypatch):
+    assert json_response_class("json") is JSONResponse
+    assert json_response_class("orjson") is ORJSONResponse
+    assert json_response_class("auto") is ORJSONResponse
+    with pytest.raises(ValueError):
+        json_response_class("ujson")
+
+    # Without orjson installed, "auto" falls back and an explicit "orjson" fails at startup
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    assert json_response_class("auto") is JSONResponse
+    with pytest.raises(RuntimeError):
+        json_response_class("orjson")
+
+
+def test_json_response_class_applies_app_wide():
+    app = create_app(Settings(debug=False, warmup=False, json_response="json"))
+    assert app.router.default_response_class is JSONResponse
+    app = create_app(Settings(debug=False, warmup=False, json_response="orjson"))
+    assert app.router.default_response_class is ORJSONResponse
+
+
+def test_production_profile_turns_debug_off(monkeypatch):
+    import d4_auth_svc.config as config
+
+    try:
+        monkeypatch.delenv("APP_DEBUG", raising=False)
+        monkeypatch.setenv("APP_ENV", "production")
+        importlib.reload(config)
+        assert config.APP_DEBUG is False
+        assert config.Settings().debug is False
+
+        # Still available when explicitly asked for
+        monkeypatch.setenv("APP_DEBUG", "1")
+        importlib.reload(config)
+        assert config.APP_DEBUG is True
+
+        monkeypatch.delenv("APP_DEBUG")
+        monkeypatch.setenv("APP_ENV", "development")
+        importlib.reload(config)
+        assert config.APP_DEBUG is True
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+def test_auth_routes_declare_response_models(client):
+    schema = client.get("/openapi.json").json()
+    models = {
+        path: schema["paths"][path]["post"]["responses"]["200"]["content"]["application/json"]["schema"]["$ref"]
+        for path in ("/auth/register", "/auth/login", "/auth/logout", "/auth/refresh")
+    }
+    assert models == {
+        "/auth/register": "#/components/schemas/RegistrationResponse",
+        "/auth/login": "#/components/schemas/TokenPairResponse",
+        "/auth/logout": "#/components/schemas/LogoutResponse",
+        "/auth/refresh": "#/components/schemas/TokenPairResponse",
+    }
+
+
+def test_login_response_matches_its_model(client, db_session):
+    hashed = bcrypt.hashpw(b"Password1", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    db_session.add(User(email="shape@example.com", full_name="Shape", hashed_password=hashed))
+    db_session.commit()
+
+    response = client.post("/auth/login", json={"email": "shape@example.com", "password": "Password1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert set(body) == {"access_token", "refresh_token", "token_type", "expires_in"}
+    assert body["token_type"] == "bearer"
+    assert isinstance(body["expires_in"], int)
@@ -0,0 +1,131 @@
+import asyncio
+import datetime
+
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+from d4_auth_svc.revocation_cache import BloomFilter, RevocationCache
+
+
+def in_hours(hours: float) -> datetime.datetime:
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=hours)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    digests = [digest_token(f"token-{n}") for n in range(1000)]
+    for digest in digests:
+        bloom.add(digest)
+    assert all(digest in bloom for digest in digests)
+    false_positives = sum(digest_token(f"other-{n}") in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_cold_cache_defers_to_database():
+    cache = RevocationCache(max_entries=10)
+    cache.add("token", in_hours(1))
+    assert cache.check("token") is None
+    assert cache.check("unknown") is None
+
+
+def test_warm_from_table_skips_expired_rows(db_session, async_session_local):
+    db_session.add(TokenBlacklist(token="live", expires_at=in_hours(1)))
+    db_session.add(TokenBlacklist(token="expired", expires_at=in_hours(-1)))
+    db_session.commit()
+
+    cache = RevocationCache(max_entries=10)
+
+    async def warm():
+        async with async_session_local() as session:
+            return await cache.warm_from(session)
+
+    assert asyncio.run(warm()) == 1
+    assert cache.check("live") is True
+    assert cache.check("expired") is False
+    assert cache.check("never-revoked") is False
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] + stats["false_positives"] == 2
+    assert stats["db_lookups"] == 0
+
+
+def test_expired_entries_stop_matching():
+    cache = RevocationCache(max_entries=10)
+    cache.warm = True
+    cache.add("short-lived", in_hours(1))
+    assert cache.check("short-lived", now=in_hours(2)) is False
+    assert len(cache) == 0
+    # Its Bloom bits are still set; later checks are misses, not false positives
+    assert cache.check("short-lived", now=in_hours(2)) is False
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["false_positives"] == 0
+
+
+def test_purged_entries_count_as_misses():
+    cache = RevocationCache(max_entries=10)
+    cache.warm = True
+    cache.add("short-lived", in_hours(1))
+    assert cache.purge_expired(now=in_hours(2)) == 1
+    assert cache.check("short-lived") is False
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["false_positives"] == 0
+
+
+def test_false_positives_are_counted():
+    # A tiny filter saturates quickly and reports most tokens as present
+    cache = RevocationCache(max_entries=1, error_rate=0.9)
+    cache.warm = True
+    cache.add("revoked", in_hours(1))
+    results = [cache.check(f"other-{n}") for n in range(50)]
+    assert all(result is False for result in results)
+    assert cache.stats()["false_positives"] > 0
+
+
+def test_overflow_falls_back_to_database(db_session, async_session_local):
+    db_session.add(TokenBlacklist(token="third", expires_at=in_hours(1)))
+    db_session.commit()
+
+    cache = RevocationCache(max_entries=2)
+    cache.warm = True
+    for token in ("first", "second", "third"):
+        cache.add(token, in_hours(1))
+    assert cache.overflowed
+    assert len(cache) == 2
+    assert cache.check("third") is None
+
+    async def lookup():
+        async with async_session_local() as session:
+            return await cache.is_revoked("third", session)
+
+    assert asyncio.run(lookup()) is True
+    assert cache.stats()["db_lookups"] == 1
+
+
+def test_purge_expired_rebuilds_saturated_filter():
+    cache = RevocationCache(max_entries=4)
+    cache.warm = True
+    for token in ("a", "b", "c"):
+        cache.add(token, in_hours(1))
+    cache.add("live", in_hours(3))
+    # Re-adding counts towards saturation without growing the map
+    cache.add("a", in_hours(1))
+    assert cache._bloom.saturated
+
+    later = in_hours(2)
+    assert cache.purge_expired(now=later) == 3
+    assert not cache._bloom.saturated
+    assert len(cache) == 1
+    assert cache.check("live", now=later) is True
+
+
+def test_logout_updates_warm_cache(client, reset_revocation_cache):
+    cache = reset_revocation_cache
+    assert cache.warm
+
+    headers = {"Authorization": "Bearer cached_token"}
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert cache.check("cached_token") is True
+
+    lookups = cache.stats()["db_lookups"]
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token already invalidated"
+    assert cache.stats()["db_lookups"] == lookups
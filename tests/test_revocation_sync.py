@@ -0,0 +1,66 @@
+import asyncio
+import datetime
+
+from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.revocation_cache import RevocationCache
+from d4_auth_svc.revocation_sync import RevocationSync
+from d4_auth_svc.throttling import per_worker_limit
+
+
+def in_hours(hours: float) -> datetime.datetime:
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=hours)
+
+
+def warm_cache(async_session_local) -> RevocationCache:
+    cache = RevocationCache(max_entries=10)
+
+    async def warm():
+        async with async_session_local() as session:
+            await cache.warm_from(session)
+
+    asyncio.run(warm())
+    return cache
+
+
+def test_revocation_by_another_process_is_picked_up(db_session, async_session_local):
+    # Two processes, each with its own warm cache over the same table
+    this_worker = warm_cache(async_session_local)
+    other_worker = warm_cache(async_session_local)
+    sync = RevocationSync(this_worker, interval_seconds=1, overlap_seconds=5)
+
+    db_session.add(TokenBlacklist(token="elsewhere", expires_at=in_hours(1)))
+    db_session.commit()
+    other_worker.add("elsewhere", in_hours(1))
+    # The warm cache is authoritative, so the revocation is invisible until synced
+    assert this_worker.check("elsewhere") is False
+
+    assert asyncio.run(sync.sync_once()) == 1
+    assert this_worker.check("elsewhere") is True
+    # The overlap window re-reads the row without counting it again
+    assert asyncio.run(sync.sync_once()) == 0
+    assert sync.stats()["tokens_synced"] == 1
+
+
+def test_sync_skips_expired_and_old_rows(db_session, async_session_local):
+    cache = warm_cache(async_session_local)
+    mark = cache.high_water_mark
+    db_session.add(TokenBlacklist(token="expired", expires_at=in_hours(-1)))
+    # Older than the overlap window; would have been loaded by the warmup
+    db_session.add(TokenBlacklist(token="old", expires_at=in_hours(1),
+                                  revoked_at=mark - datetime.timedelta(minutes=10)))
+    db_session.commit()
+
+    assert asyncio.run(RevocationSync(cache, 1, 5).sync_once()) == 0
+    assert cache.high_water_mark == mark
+
+
+def test_cold_cache_does_not_sync(async_session_local):
+    cache = RevocationCache(max_entries=10)
+    assert asyncio.run(RevocationSync(cache, 1, 5).sync_once()) == 0
+
+
+def test_rate_limits_are_split_between_workers():
+    assert per_worker_limit(100, 1) == 100
+    assert per_worker_limit(100, 4) == 25
+    assert per_worker_limit(10, 4) == 3
+    assert per_worker_limit(1, 8) == 1
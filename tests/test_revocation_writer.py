@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+
+from sqlalchemy import event
+
+from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.revocation_writer import RevocationWriter, insert_or_ignore
+
+EXPIRES_AT = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+
+def test_concurrent_revocations_share_commits(db_session, async_session_local):
+    writer = RevocationWriter(window_seconds=0.05, max_batch=25)
+    commits = []
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "commit", count_commit)
+
+    async def run():
+        return await asyncio.gather(*(writer.revoke(f"token-{i}", EXPIRES_AT) for i in range(60)))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        event.remove(engine, "commit", count_commit)
+    assert results == [True] * 60
+    # Two full batches flushed by size, the remainder by the window
+    assert writer.stats()["batches"] == 3
+    assert len(commits) == 3
+    assert db_session.query(TokenBlacklist).count() == 60
+
+
+def test_already_revoked_and_repeated_tokens(db_session):
+    db_session.add(TokenBlacklist(token="old", expires_at=EXPIRES_AT))
+    db_session.commit()
+    writer = RevocationWriter(window_seconds=0.01, max_batch=100)
+
+    async def run():
+        return await asyncio.gather(writer.revoke("new", EXPIRES_AT), writer.revoke("new", EXPIRES_AT),
+                                    writer.revoke("old", EXPIRES_AT))
+
+    assert asyncio.run(run()) == [True, False, False]
+    assert writer.stats()["duplicates"] == 1
+    assert db_session.query(TokenBlacklist).count() == 2
+
+
+def test_insert_or_ignore_per_dialect():
+    table = TokenBlacklist.__table__
+    assert "ON CONFLICT DO NOTHING" in str(insert_or_ignore("sqlite", table))
+    assert "INSERT IGNORE" in str(insert_or_ignore("mysql", table))
+    assert insert_or_ignore("oracle", table) is None
+
+
+def test_newly_revoked_comes_from_returning(db_session, async_session_local):
+    # Written by another worker after any check this one could have made
+    db_session.add(TokenBlacklist(token="raced", expires_at=EXPIRES_AT))
+    db_session.commit()
+    writer = RevocationWriter(window_seconds=0.01, max_batch=100)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+
+    async def run():
+        return await asyncio.gather(writer.revoke("raced", EXPIRES_AT), writer.revoke("fresh", EXPIRES_AT))
+
+    try:
+        assert asyncio.run(run()) == [False, True]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert not any(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    assert any("RETURNING" in statement for statement in statements)
+
+
+def test_dialects_without_returning_check_first(db_session, async_session_local, monkeypatch):
+    db_session.add(TokenBlacklist(token="old", expires_at=EXPIRES_AT))
+    db_session.commit()
+    dialect = async_session_local.kw["bind"].dialect
+    monkeypatch.setattr(dialect, "insert_executemany_returning", False)
+    writer = RevocationWriter(window_seconds=0.01, max_batch=100)
+
+    async def run():
+        return await asyncio.gather(writer.revoke("old", EXPIRES_AT), writer.revoke("new", EXPIRES_AT))
+
+    assert asyncio.run(run()) == [False, True]
+    assert db_session.query(TokenBlacklist).count() == 2
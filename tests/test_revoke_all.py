@@ -0,0 +1,95 @@
+import bcrypt
+from sqlalchemy import event
+
+from d4_auth_svc.token_epochs import UserEpochCache
+from d4_auth_svc.models.user import User
+from d4_auth_svc.tokens import token_signer
+
+
+def create_user(db_session) -> User:
+    hashed = bcrypt.hashpw(b"testpassword", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    user = User(email="everywhere@example.com", full_name="Everywhere User", hashed_password=hashed)
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def login(client) -> dict:
+    response = client.post("/auth/login", json={"email": "everywhere@example.com", "password": "testpassword"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_revoke_all_ends_every_token_and_session(client, db_session, async_session_local):
+    create_user(db_session)
+    laptop, phone = login(client), login(client)
+    assert token_signer.decode(laptop["access_token"]).gen == 0
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/auth/revoke-all", headers=bearer(laptop))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    # A single UPDATE, no matter how many tokens are outstanding
+    writes = [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+    assert len(writes) == 1
+    assert writes[0].lstrip().upper().startswith("UPDATE USERS")
+
+    for tokens in (laptop, phone):
+        response = client.get("/auth/verify", headers=bearer(tokens))
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token revoked"
+        assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    results = client.post("/auth/introspect", json={"tokens": [phone["access_token"]]}).json()["results"]
+    assert results[0]["status"] == "revoked"
+
+    # New logins carry the new epoch
+    fresh = login(client)
+    assert token_signer.decode(fresh["access_token"]).gen == 1
+    assert client.get("/auth/verify", headers=bearer(fresh)).status_code == 200
+    assert client.post("/auth/revoke-all", headers=bearer(laptop)).status_code == 401
+
+
+def test_revoke_all_by_another_process_is_seen_after_the_ttl(client, db_session, reset_user_epochs, monkeypatch):
+    user = create_user(db_session)
+    tokens = login(client)
+    assert client.get("/auth/verify", headers=bearer(tokens)).status_code == 200
+
+    user.token_epoch += 1
+    db_session.commit()
+    # Still answered from the cached epoch until the entry ages out
+    assert client.get("/auth/verify", headers=bearer(tokens)).status_code == 200
+    monkeypatch.setattr(reset_user_epochs, "ttl_seconds", 0)
+    assert client.get("/auth/verify", headers=bearer(tokens)).status_code == 401
+
+
+def test_tokens_without_epoch_are_not_looked_up(client, reset_user_epochs):
+    token = token_signer.issue("12345", ttl_seconds=60)
+    assert client.get("/auth/verify", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert reset_user_epochs.stats()["misses"] == 0
+
+
+def test_epoch_cache_expiry_and_bound():
+    cache = UserEpochCache(ttl_seconds=10, max_entries=2)
+    cache.set(1, 0, now=100)
+    assert cache.get(1, now=105) == 0
+    assert cache.get(1, now=110) is None
+    cache.set(2, 3, now=100)
+    cache.set(3, 4, now=100)
+    cache.set(4, 5, now=100)
+    assert len(cache) == 2
+    assert cache.get(2, now=101) is None
+    cache.invalidate(4)
+    assert cache.get(4, now=101) is None
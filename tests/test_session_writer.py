@@ -0,0 +1,58 @@
+import asyncio
+
+from sqlalchemy import event
+
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.user import User
+from d4_auth_svc.session_writer import SessionWriter
+
+
+def add_user(db_session) -> int:
+    user = User(email="sessions@example.com", full_name="Session User", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+
+def test_concurrent_logins_share_commits(db_session, async_session_local):
+    user_id = add_user(db_session)
+    writer = SessionWriter(window_seconds=0.05, max_batch=25)
+    commits = []
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "commit", count_commit)
+
+    async def run():
+        return await asyncio.gather(*(writer.create(user_id, token_epoch=3) for _ in range(60)))
+
+    try:
+        created = asyncio.run(run())
+    finally:
+        event.remove(engine, "commit", count_commit)
+    # Two full batches flushed by size, the remainder by the window
+    assert writer.stats()["batches"] == 3
+    assert len(commits) == 3
+    stored = {auth_session.id: auth_session for auth_session in db_session.query(AuthSession)}
+    assert len(stored) == 60
+    for auth_session, refresh_token in created:
+        assert refresh_token.split(".")[0] == auth_session.id
+        assert stored[auth_session.id].refresh_token_hash == auth_session.refresh_token_hash
+        assert stored[auth_session.id].token_epoch == 3
+
+
+def test_failed_batch_fails_every_login(db_session, monkeypatch):
+    user_id = add_user(db_session)
+    writer = SessionWriter(window_seconds=0.01, max_batch=100)
+    # Colliding ids make the whole INSERT fail
+    monkeypatch.setattr("d4_auth_svc.sessions.secrets.token_hex", lambda nbytes: "0" * 32)
+
+    async def run():
+        return await asyncio.gather(writer.create(user_id), writer.create(user_id), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, Exception) for result in results)
+    assert writer.stats()["errors"] == 1
+    assert db_session.query(AuthSession).count() == 0
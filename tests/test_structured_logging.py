@@ -0,0 +1,96 @@
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import d4_auth_svc
+from d4_auth_svc.structured_logging import BoundedQueueHandler, RepeatLimiter, log_stats, request_id
+
+
+def make_logger(handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger("test_structured_logging")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def record(lineno: int = 10, level: int = logging.ERROR) -> logging.LogRecord:
+    return logging.LogRecord("app", level, "app.py", lineno, "boom", None, None)
+
+
+def test_records_are_written_as_json_lines_by_the_listener():
+    stream = io.StringIO()
+    handler = BoundedQueueHandler(queue_size=100, repeat_limit=0, stream=stream)
+    logger = make_logger(handler)
+
+    token = request_id.set("req-123")
+    try:
+        try:
+            raise ValueError("database unavailable")
+        except ValueError as e:
+            logger.error(e, exc_info=True)
+        logger.info("user %s logged in", 42)
+    finally:
+        request_id.reset(token)
+    handler.close()
+
+    error, info = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert error["level"] == "ERROR"
+    assert error["msg"] == "database unavailable"
+    assert error["request_id"] == "req-123"
+    assert "Traceback" in error["exc"] and "ValueError" in error["exc"]
+    assert info["msg"] == "user 42 logged in"
+    assert "exc" not in info
+
+
+def test_full_queue_drops_and_counts():
+    log_stats.reset()
+    stream = io.StringIO()
+    handler = BoundedQueueHandler(queue_size=2, repeat_limit=0, stream=stream)
+    # Nobody drains the queue, so it fills up
+    handler.listener.stop()
+    logger = make_logger(handler)
+    for i in range(5):
+        logger.warning("event %d", i)
+
+    assert log_stats.stats() == {"enqueued": 2, "dropped": 3, "suppressed": 0}
+    handler.close()
+
+
+def test_repeated_errors_are_limited_per_window():
+    limiter = RepeatLimiter(limit=2, window_seconds=10)
+    assert [limiter.allow(record(), now=100 + i) for i in range(5)] == [True, True, False, False, False]
+    # Another call site has its own budget; informational records are never limited
+    assert limiter.allow(record(lineno=11), now=104)
+    assert limiter.allow(record(level=logging.INFO), now=104)
+
+    first_after_window = record()
+    assert limiter.allow(first_after_window, now=110)
+    assert first_after_window.suppressed == 3
+
+
+def test_request_ids_are_assigned_and_echoed(client):
+    generated = client.get("/healthz").headers["X-Request-ID"]
+    assert len(generated) == 32
+    assert client.get("/healthz", headers={"X-Request-ID": "lb-abc.123"}).headers["X-Request-ID"] == "lb-abc.123"
+    # Anything that is not a plain token is replaced rather than echoed into the logs
+    assert client.get("/healthz", headers={"X-Request-ID": "a b\"c"}).headers["X-Request-ID"] != "a b\"c"
+
+
+def test_logging_config_is_applied_and_flushed_at_exit():
+    code = (
+        "import logging\n"
+        "from d4_auth_svc.structured_logging import configure_logging\n"
+        "configure_logging()\n"
+        "logging.getLogger('uvicorn.error').info('Started server process')\n"
+        "logging.getLogger('d4_auth_svc').error('email outage')\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(Path(d4_auth_svc.__file__).parents[1])}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    lines = [json.loads(line) for line in result.stderr.splitlines()]
+    assert [(line["logger"], line["msg"]) for line in lines] == [
+        ("uvicorn.error", "Started server process"), ("d4_auth_svc", "email outage")]
@@ -0,0 +1,110 @@
+import bcrypt
+
+from d4_auth_svc.hashing import PasswordHasher
+from d4_auth_svc.models.user import User
+from d4_auth_svc.throttling import LoginThrottle, SlidingWindowLimiter
+
+
+def test_sliding_window_allows_up_to_limit():
+    limiter = SlidingWindowLimiter(limit=3, window_seconds=10, max_keys=100)
+    assert [limiter.hit("key", now=t) for t in (0, 1, 2)] == [0, 0, 0]
+    retry_after = limiter.hit("key", now=3)
+    assert retry_after > 0
+    # Other keys have their own budget
+    assert limiter.hit("other", now=3) == 0
+
+
+def test_previous_window_is_weighted():
+    limiter = SlidingWindowLimiter(limit=4, window_seconds=10, max_keys=100)
+    for _ in range(4):
+        limiter.hit("key", now=0)
+    # Early in the next window 95% of the previous attempts still count: 3.8 < 4
+    assert limiter.hit("key", now=10.5) == 0
+    # 3.6 + 1 >= 4
+    assert limiter.hit("key", now=11) > 0
+    # Once the previous window has mostly slid out, attempts are allowed again
+    assert limiter.hit("key", now=18) == 0
+
+
+def test_retry_after_lets_the_next_attempt_through():
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=10, max_keys=100)
+    limiter.hit("key", now=0)
+    limiter.hit("key", now=0)
+    retry_after = limiter.hit("key", now=1)
+    assert retry_after > 0
+    assert limiter.hit("key", now=1 + retry_after) == 0
+
+
+def test_buckets_are_bounded_and_expire():
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=10, max_keys=3)
+    for n in range(5):
+        limiter.hit(f"key-{n}", now=0)
+    assert len(limiter) == 3
+    limiter.hit("late", now=25)
+    assert len(limiter) == 1
+
+
+def test_overloaded_hash_queue_is_shed():
+    hasher = PasswordHasher(max_workers=1)
+    throttle = LoginThrottle(per_email=10, per_ip=10, window_seconds=60, max_keys=100,
+                             max_hash_queue_depth=2, hasher=hasher)
+    hasher.in_flight = 3
+    rejection = throttle.admit("user@example.com", "10.0.0.1")
+    assert rejection.status_code == 503
+    assert rejection.retry_after == 1
+    assert throttle.stats()["rejected_overload"] == 1
+    # Shed attempts do not consume rate-limit budget
+    assert len(throttle.ip_limiter) == 0
+
+
+def test_email_spellings_of_one_account_share_a_bucket():
+    throttle = LoginThrottle(per_email=2, per_ip=100, window_seconds=60, max_keys=100,
+                             max_hash_queue_depth=0, hasher=PasswordHasher(max_workers=1))
+    assert throttle.admit("user@example.com", "10.0.0.1") is None
+    assert throttle.admit(" User@Example.com ", "10.0.0.2") is None
+    rejection = throttle.admit("user@example.com  ", "10.0.0.3")
+    assert rejection.status_code == 429
+    assert len(throttle.email_limiter) == 1
+
+
+def test_disabled_throttle_admits_everything():
+    throttle = LoginThrottle(per_email=0, per_ip=0, window_seconds=60, max_keys=100,
+                             max_hash_queue_depth=0, hasher=PasswordHasher(max_workers=1), enabled=False)
+    assert throttle.admit("user@example.com", "10.0.0.1") is None
+
+
+def test_login_is_rate_limited_per_email(client, db_session, reset_login_throttle, monkeypatch):
+    hashed = bcrypt.hashpw(b"Password1", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    db_session.add(User(email="target@example.com", full_name="Target", hashed_password=hashed))
+    db_session.commit()
+    monkeypatch.setattr(reset_login_throttle.email_limiter, "limit", 3)
+
+    for _ in range(3):
+        response = client.post("/auth/login", json={"email": "target@example.com", "password": "wrongpassword"})
+        assert response.status_code == 401
+
+    response = client.post("/auth/login", json={"email": "Target@example.com", "password": "Password1"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert reset_login_throttle.stats()["rejected_email"] == 1
+
+    # A different account from the same client is unaffected
+    response = client.post("/auth/login", json={"email": "other@example.com", "password": "Password1"})
+    assert response.status_code == 401
+
+
+def test_login_is_rate_limited_per_ip(client, reset_login_throttle, monkeypatch):
+    monkeypatch.setattr(reset_login_throttle.ip_limiter, "limit", 2)
+    statuses = [
+        client.post("/auth/login", json={"email": f"user{n}@example.com", "password": "x"}).status_code
+        for n in range(3)
+    ]
+    assert statuses == [401, 401, 429]
+    assert reset_login_throttle.stats()["rejected_ip"] == 1
+
+
+def test_login_returns_503_when_hash_queue_is_full(client, reset_login_throttle, monkeypatch):
+    monkeypatch.setattr(reset_login_throttle.hasher, "in_flight", 10_000)
+    response = client.post("/auth/login", json={"email": "user@example.com", "password": "x"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -1,7 +1,7 @@
 import datetime
 import pytest
 
-from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
 from d4_auth_svc.models.base import SessionLocal, Base, engine
 
 # Ensure that the new table is created in the test database
@@ -23,10 +23,12 @@ def test_insert_and_retrieve_token_blacklist(db_session):
     session.commit()
     
     # Retrieve record
-    retrieved = session.get(TokenBlacklist, token_value)
+    retrieved = session.get(TokenBlacklist, digest_token(token_value))
     
     assert retrieved is not None
-    assert retrieved.token == token_value
+    # Only the fixed-width digest is stored, never the token itself
+    assert retrieved.token_digest == digest_token(token_value)
+    assert len(retrieved.token_digest) == 32
     # Allow slight difference in timestamp due to DB precision
     assert abs((retrieved.expires_at - expires).total_seconds()) < 1
 
@@ -45,5 +47,5 @@ def test_token_blacklist_deletion(db_session):
     session.commit()
     
     # Ensure the record is deleted
-    retrieved = session.get(TokenBlacklist, token_value)
+    retrieved = session.get(TokenBlacklist, digest_token(token_value))
     assert retrieved is None
@@ -0,0 +1,77 @@
+import datetime
+
+from sqlalchemy import event
+
+from d4_auth_svc.config import INTROSPECT_MAX_TOKENS
+from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.routers.token_introspect import introspection_stats
+from d4_auth_svc.tokens import token_signer
+
+
+def test_introspect_reports_status_per_token(client):
+    valid = token_signer.issue("1", ttl_seconds=60)
+    revoked = token_signer.issue("2", ttl_seconds=60)
+    expired = token_signer.issue("3", ttl_seconds=-1)
+    assert client.post("/auth/logout", headers={"Authorization": f"Bearer {revoked}"}).status_code == 200
+
+    batches = introspection_stats.batches
+    response = client.post("/auth/introspect", json={"tokens": [valid, revoked, expired, "garbage", valid]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["valid", "revoked", "expired", "malformed", "valid"]
+    assert results[0]["sub"] == "1"
+    assert "sub" not in results[1]
+    assert response.headers["Server-Timing"].startswith("introspect;dur=")
+    assert introspection_stats.batches == batches + 1
+
+
+def test_revocation_is_resolved_with_one_query(client, db_session, async_session_local, reset_revocation_cache):
+    tokens = [token_signer.issue(str(n), ttl_seconds=60) for n in range(50)]
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    db_session.add_all(TokenBlacklist(token=token, expires_at=expires) for token in tokens[:10])
+    db_session.commit()
+    # Cold cache: every authentic token has to be resolved against the table
+    reset_revocation_cache.reset()
+    statements = []
+
+    def count_blacklist_queries(conn, cursor, statement, *args):
+        if "token_blacklist" in statement:
+            statements.append(statement)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", count_blacklist_queries)
+    try:
+        response = client.post("/auth/introspect", json={"tokens": tokens})
+    finally:
+        event.remove(engine, "before_cursor_execute", count_blacklist_queries)
+
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.json()["results"]]
+    assert statuses == ["revoked"] * 10 + ["valid"] * 40
+    assert len(statements) == 1
+    assert " IN " in statements[0]
+
+
+def test_warm_cache_avoids_the_database(client, async_session_local, reset_revocation_cache):
+    assert reset_revocation_cache.warm
+    statements = []
+
+    def count_queries(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", count_queries)
+    try:
+        response = client.post("/auth/introspect", json={"tokens": [token_signer.issue("1", ttl_seconds=60)]})
+    finally:
+        event.remove(engine, "before_cursor_execute", count_queries)
+
+    assert response.json()["results"][0]["status"] == "valid"
+    assert statements == []
+
+
+def test_request_size_limits(client):
+    assert client.post("/auth/introspect", json={"tokens": []}).status_code == 422
+    too_many = ["x"] * (INTROSPECT_MAX_TOKENS + 1)
+    assert client.post("/auth/introspect", json={"tokens": too_many}).status_code == 422
+    assert client.post("/auth/introspect", json={"tokens": ["x" * 5000]}).status_code == 422
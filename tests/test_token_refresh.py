@@ -0,0 +1,124 @@
+import datetime
+
+import bcrypt
+from sqlalchemy import event
+
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.user import User
+from d4_auth_svc.tokens import token_signer
+
+
+def login(client, db_session) -> dict:
+    hashed = bcrypt.hashpw(b"testpassword", bcrypt.gensalt(rounds=4)).decode('utf-8')
+    db_session.add(User(email="refresh@example.com", full_name="Refresh User", hashed_password=hashed))
+    db_session.commit()
+    response = client.post("/auth/login", json={"email": "refresh@example.com", "password": "testpassword"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def stored_session(db_session, session_id: str) -> AuthSession:
+    db_session.expire_all()
+    return db_session.get(AuthSession, session_id)
+
+
+def test_login_creates_session(client, db_session):
+    tokens = login(client, db_session)
+    assert tokens["token_type"] == "bearer"
+    claims = token_signer.decode(tokens["access_token"])
+    session_id = tokens["refresh_token"].split(".")[0]
+    assert claims.sid == session_id
+
+    auth_session = stored_session(db_session, session_id)
+    assert str(auth_session.user_id) == claims.sub
+    # Only a digest of the refresh token is stored
+    assert tokens["refresh_token"].split(".")[1] not in auth_session.refresh_token_hash
+    assert auth_session.expires_at > datetime.datetime.utcnow() + datetime.timedelta(days=1)
+
+
+def test_refresh_rotates_tokens(client, db_session):
+    tokens = login(client, db_session)
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert token_signer.decode(rotated["access_token"]).sid == tokens["refresh_token"].split(".")[0]
+
+    again = client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert again.status_code == 200
+    assert stored_session(db_session, tokens["refresh_token"].split(".")[0]).generation == 2
+
+
+def test_reuse_revokes_the_session(client, db_session):
+    tokens = login(client, db_session)
+    rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+    # Replaying the rotated-out token looks like theft; the session ends for everyone
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token reuse detected; session revoked"
+    assert stored_session(db_session, tokens["refresh_token"].split(".")[0]).revoked_at is not None
+
+    response = client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+
+
+def test_unknown_secret_does_not_end_the_session(client, db_session):
+    tokens = login(client, db_session)
+    session_id = tokens["refresh_token"].split(".")[0]
+    # The session id is readable in every access token; guessing a secret must not revoke the session
+    assert token_signer.decode(tokens["access_token"]).sid == session_id
+
+    response = client.post("/auth/refresh", json={"refresh_token": f"{session_id}.garbage"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token"
+    assert stored_session(db_session, session_id).revoked_at is None
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+
+
+def test_expired_session(client, db_session):
+    tokens = login(client, db_session)
+    auth_session = stored_session(db_session, tokens["refresh_token"].split(".")[0])
+    auth_session.expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    db_session.commit()
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token expired"
+
+
+def test_malformed_and_unknown_tokens(client):
+    for token in ("no-separator", "unknown-session.secret", ".secret"):
+        response = client.post("/auth/refresh", json={"refresh_token": token})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid refresh token"
+
+
+def test_logout_ends_the_session(client, db_session):
+    tokens = login(client, db_session)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_verify_does_not_touch_the_database(client, db_session, async_session_local):
+    tokens = login(client, db_session)
+    statements = []
+
+    def count_queries(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = async_session_local.kw["bind"].sync_engine
+    event.listen(engine, "before_cursor_execute", count_queries)
+    try:
+        for _ in range(3):
+            response = client.get("/auth/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+            assert response.status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", count_queries)
+    assert statements == []
@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+
+from d4_auth_svc.models.session import AuthSession
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+from d4_auth_svc.models.user import User
+from d4_auth_svc.token_sweeper import TokenSweeper, purge_expired_sessions, purge_expired_tokens
+
+
+def add_tokens(db_session, prefix: str, count: int, hours: float) -> None:
+    expires = datetime.datetime.utcnow() + datetime.timedelta(hours=hours)
+    db_session.add_all(TokenBlacklist(token=f"{prefix}-{n}", expires_at=expires) for n in range(count))
+    db_session.commit()
+
+
+def test_purges_only_expired_rows_in_batches(db_session, async_session_local):
+    add_tokens(db_session, "expired", 25, hours=-1)
+    add_tokens(db_session, "live", 5, hours=1)
+
+    result = asyncio.run(purge_expired_tokens(async_session_local, batch_size=10, max_rows_per_second=0))
+
+    assert result.rows_purged == 25
+    assert result.batches == 3
+    assert result.seconds >= 0
+    remaining = {row.token_digest for row in db_session.query(TokenBlacklist).all()}
+    assert remaining == {digest_token(f"live-{n}") for n in range(5)}
+
+
+def test_rate_limit_spaces_out_batches(db_session, async_session_local):
+    add_tokens(db_session, "expired", 30, hours=-1)
+
+    # Two full batches of 10 rows at 200 rows/s sleep at least 0.1s in total
+    result = asyncio.run(purge_expired_tokens(async_session_local, batch_size=10, max_rows_per_second=200))
+
+    assert result.rows_purged == 30
+    assert result.seconds >= 0.1
+
+
+def test_nothing_to_purge(async_session_local):
+    result = asyncio.run(purge_expired_tokens(async_session_local, batch_size=10))
+    assert result.rows_purged == 0
+    assert result.batches == 0
+
+
+def test_periodic_sweeper_reports_totals(db_session):
+    add_tokens(db_session, "expired", 3, hours=-1)
+    sweeper = TokenSweeper(interval_seconds=0.01, batch_size=10, max_rows_per_second=0)
+
+    async def run():
+        await sweeper.start()
+        while sweeper.sweeps == 0:
+            await asyncio.sleep(0.01)
+        await sweeper.stop()
+
+    asyncio.run(run())
+    stats = sweeper.stats()
+    assert stats["rows_purged"] == 3
+    assert stats["sweeps"] >= 1
+    assert db_session.query(TokenBlacklist).count() == 0
+
+
+def test_disabled_sweeper_does_not_start():
+    sweeper = TokenSweeper(interval_seconds=0, batch_size=10, max_rows_per_second=0)
+    asyncio.run(sweeper.start())
+    assert sweeper._task is None
+
+
+def test_purges_expired_sessions(db_session, async_session_local):
+    user = User(email="sweep@example.com", full_name="Sweep User", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    now = datetime.datetime.utcnow()
+    for n, hours in enumerate((-2, -1, 1)):
+        db_session.add(AuthSession(id=f"session-{n}", user_id=user.id, refresh_token_hash="x",
+                                   expires_at=now + datetime.timedelta(hours=hours)))
+    db_session.commit()
+
+    result = asyncio.run(purge_expired_sessions(async_session_local, batch_size=10, max_rows_per_second=0))
+    assert result.rows_purged == 2
+    assert [s.id for s in db_session.query(AuthSession)] == ["session-2"]
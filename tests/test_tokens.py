@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
+from d4_auth_svc.tokens import (
+    ExpiredTokenError,
+    MalformedTokenError,
+    TokenSigner,
+    parse_signing_keys,
+    token_signer,
+)
+
+NOW = 1_700_000_000
+
+
+def test_issue_and_decode_roundtrip():
+    signer = TokenSigner({"k1": b"secret-one"})
+    token = signer.issue("42", ttl_seconds=60, now=NOW)
+    assert token.startswith("v1.k1.")
+
+    claims = signer.decode(token, now=NOW + 30)
+    assert claims.sub == "42"
+    assert claims.iat == NOW
+    assert claims.exp == NOW + 60
+    # Tokens issued together still differ
+    assert signer.issue("42", ttl_seconds=60, now=NOW) != token
+
+
+def test_expired_token():
+    signer = TokenSigner({"k1": b"secret-one"})
+    token = signer.issue("42", ttl_seconds=60, now=NOW)
+    with pytest.raises(ExpiredTokenError):
+        signer.decode(token, now=NOW + 60)
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "deadbeef" * 4,
+    "v1.k1.payload",
+    "v2.k1.e30.AAAA",
+    "v1.k1.!!!.???",
+])
+def test_malformed_tokens(token):
+    with pytest.raises(MalformedTokenError):
+        TokenSigner({"k1": b"secret-one"}).decode(token, now=NOW)
+
+
+def test_tampered_claims_are_rejected():
+    signer = TokenSigner({"k1": b"secret-one"})
+    version, kid, payload, signature = signer.issue("42", ttl_seconds=60, now=NOW).split(".")
+    forged = signer.issue("1", ttl_seconds=60, now=NOW).split(".")[2]
+    with pytest.raises(MalformedTokenError):
+        signer.decode(".".join([version, kid, forged, signature]), now=NOW)
+
+
+def test_key_rotation():
+    old = TokenSigner({"k1": b"secret-one"})
+    old_token = old.issue("42", ttl_seconds=60, now=NOW)
+
+    rotated = TokenSigner({"k1": b"secret-one", "k2": b"secret-two"}, active_key_id="k2")
+    assert rotated.issue("42", ttl_seconds=60, now=NOW).startswith("v1.k2.")
+    assert rotated.decode(old_token, now=NOW).sub == "42"
+
+    retired = TokenSigner({"k2": b"secret-two"})
+    with pytest.raises(MalformedTokenError):
+        retired.decode(old_token, now=NOW)
+
+
+def test_parse_signing_keys():
+    assert parse_signing_keys("k1:abc, k2:d:ef") == {"k1": b"abc", "k2": b"d:ef"}
+    assert parse_signing_keys(None) == {}
+    with pytest.raises(ValueError):
+        parse_signing_keys("no-secret")
+    with pytest.raises(ValueError):
+        TokenSigner({"k1": b"abc"}, active_key_id="k9")
+
+
+def test_verify_valid_token(client):
+    token = token_signer.issue("7", ttl_seconds=60)
+    response = client.get("/auth/verify", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["active"] is True
+    assert data["sub"] == "7"
+
+
+def test_verify_rejects_bad_tokens(client):
+    response = client.get("/auth/verify")
+    assert response.status_code == 400
+
+    response = client.get("/auth/verify", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid token"
+
+    expired = token_signer.issue("7", ttl_seconds=-1)
+    response = client.get("/auth/verify", headers={"Authorization": f"Bearer {expired}"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token expired"
+
+
+def test_verify_after_logout(client, db_session):
+    token = token_signer.issue("7", ttl_seconds=60)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+
+    response = client.get("/auth/verify", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token revoked"
+
+    # The revocation only needs to live as long as the token
+    entry = db_session.get(TokenBlacklist, digest_token(token))
+    expected = datetime.datetime.utcfromtimestamp(token_signer.decode(token).exp)
+    assert entry.expires_at == expected
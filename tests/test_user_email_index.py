@@ -0,0 +1,63 @@
+from sqlalchemy import inspect, insert, select, text
+
+from d4_auth_svc.models.user import User, email_matches, normalize_email
+
+
+def query_plan(db_session, query) -> str:
+    sql = query.compile(dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True})
+    rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_user_lookups_use_the_normalized_email_index(db_session):
+    db_session.execute(insert(User), [
+        {"email": f"User{n}@Example.com", "email_normalized": f"user{n}@example.com",
+         "full_name": "Plan User", "hashed_password": "x"}
+        for n in range(5000)
+    ])
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+
+    # Login loads the row found through the index
+    plan = query_plan(db_session, select(User).where(email_matches("USER42@example.com")))
+    assert "USING INDEX ix_users_email_normalized" in plan
+    assert "SCAN" not in plan
+    # The registration check and the bulk import's existence check never read the table
+    plan = query_plan(db_session, select(User.id).where(email_matches("user42@example.com")))
+    assert "USING COVERING INDEX ix_users_email_normalized" in plan
+    emails = [f"user{n}@example.com" for n in range(0, 5000, 50)]
+    plan = query_plan(db_session, select(User.email_normalized).where(User.email_normalized.in_(emails)))
+    assert "USING COVERING INDEX ix_users_email_normalized" in plan
+    assert "SCAN" not in plan
+
+
+def test_users_have_no_redundant_indexes(db_session):
+    indexes = inspect(db_session.bind).get_indexes("users")
+    assert [(index["name"], index["column_names"]) for index in indexes] == [
+        ("ix_users_email_normalized", ["email_normalized"]),
+    ]
+
+
+def test_email_is_normalized_on_assignment():
+    user = User(email=" Mixed.Case@Example.COM", full_name="Mixed", hashed_password="x")
+    assert user.email == " Mixed.Case@Example.COM"
+    assert user.email_normalized == normalize_email(user.email) == "mixed.case@example.com"
+
+
+def test_emails_match_regardless_of_case(client, db_session, monkeypatch):
+    monkeypatch.setattr("d4_auth_svc.routers.user_registration.send_welcome_email", lambda email, full_name: None)
+    response = client.post("/auth/register",
+                           json={"email": "Alice@Example.com", "full_name": "Alice", "password": "Password1"})
+    assert response.status_code == 200
+    # The local part keeps its case; only the lookup key is lowercased
+    assert db_session.execute(select(User.email, User.email_normalized)).one() == \
+        ("Alice@example.com", "alice@example.com")
+
+    response = client.post("/auth/register",
+                           json={"email": "ALICE@example.com", "full_name": "Alice again", "password": "Password1"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+    response = client.post("/auth/login", json={"email": "alice@EXAMPLE.com", "password": "Password1"})
+    assert response.status_code == 200
+    assert "access_token" in response.json()
@@ -1,6 +1,7 @@
 import bcrypt
 
 from d4_auth_svc.models.user import User
+from d4_auth_svc.tokens import token_signer
 
 
 def get_hashed_password(password: str) -> str:
@@ -18,8 +19,10 @@ def test_valid_login(client, db_session):
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
-    # The token is 32 hex characters as generated by token_hex(16)
-    assert len(data["access_token"]) == 32
+    # The token is signed and names the user as its subject
+    claims = token_signer.decode(data["access_token"])
+    assert claims.sub == str(user.id)
+    assert claims.exp > claims.iat
 
 
 def test_invalid_login(client, db_session):
@@ -2,7 +2,7 @@ import datetime
 import pytest
 
 from fastapi.testclient import TestClient
-from d4_auth_svc.models.token_blacklist import TokenBlacklist
+from d4_auth_svc.models.token_blacklist import TokenBlacklist, digest_token
 from d4_auth_svc.app import app
 
 client = TestClient(app)
@@ -44,7 +44,7 @@ def test_logout_success(db_session):
     assert "Logout successful" in response_data.get("message", "")
 
     # Verify that the token has been inserted in the token_blacklist
-    record = db_session.get(TokenBlacklist, token)
+    record = db_session.get(TokenBlacklist, digest_token(token))
     assert record is not None
 
 